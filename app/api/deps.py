@@ -1,9 +1,115 @@
 # app/api/deps.py
-from typing import Generator
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Generator, Optional, Sequence
 
+from fastapi import HTTPException, Query, UploadFile
+
+from app.db.models import PostType
+from app.db.repositories.base import Keyset
+
+# Keyset pagination: list endpoints return the cursor for the next page in this header
+# (absent on the last page) and accept it back as `?cursor=`; the body shape is unchanged
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{id}".encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Keyset]:
+    if not cursor:
+        return None
+    try:
+        created_at, id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(rows: Sequence, limit: int) -> Optional[str]:
+    """Cursor after the last row of a full page (rows ordered by created_at DESC, id DESC)."""
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def cursor_headers(cursor: Optional[str]) -> dict:
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
+
+
+@dataclass(slots=True)
 class CommonQueryParams:
-    def __init__(self, skip: int = 0, limit: int = 100):
-        self.skip = skip
-        self.limit = limit
+    skip: int = 0
+    limit: int = 100
+    cursor: Optional[str] = None  # from X-Next-Cursor; takes precedence over skip
+
+    @property
+    def after(self) -> Optional[Keyset]:
+        return decode_cursor(self.cursor)
+
+pagination_params = CommonQueryParams
+
+
+@dataclass(slots=True)
+class FeedQueryParams:
+    """Post feeds: smaller default page and a hard cap, since every post carries author + media."""
+    skip: int = Query(0, ge=0)
+    limit: int = Query(50, ge=1, le=100)
+    cursor: Optional[str] = Query(None)
+
+    @property
+    def after(self) -> Optional[Keyset]:
+        return decode_cursor(self.cursor)
+
+feed_pagination_params = FeedQueryParams
+
+
+# Post media limits, checked before any database or Cloudinary work
+ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png"}
+ALLOWED_VIDEO_TYPES = {"video/mp4", "video/quicktime"}
+MAX_IMAGES_PER_POST = 10
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+MAX_VIDEO_BYTES = 200 * 1024 * 1024
+
+
+def _upload_size(file: UploadFile) -> int:
+    if file.size is not None:
+        return file.size
+    # Measure the spooled file without consuming it
+    position = file.file.tell()
+    file.file.seek(0, 2)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+
+def validate_media_uploads(
+    images: Optional[list[UploadFile]],
+    video: Optional[UploadFile],
+    post_type: PostType,
+    content: Optional[str] = None,
+) -> None:
+    """400 on the first problem with a multipart post's media; pure checks, no I/O."""
+    if images and video:
+        raise HTTPException(400, "Cannot upload images and video together")
+    if post_type == PostType.REEL and not video:
+        raise HTTPException(400, "Reel post requires a video")
+    if post_type == PostType.POST and not (content or images):
+        raise HTTPException(400, "Post must have text or image")
+
+    if images:
+        if len(images) > MAX_IMAGES_PER_POST:
+            raise HTTPException(400, f"At most {MAX_IMAGES_PER_POST} images per post")
+        if any(img.content_type not in ALLOWED_IMAGE_TYPES for img in images):
+            raise HTTPException(400, "Only JPG and PNG images allowed")
+        if any(_upload_size(img) > MAX_IMAGE_BYTES for img in images):
+            raise HTTPException(400, f"Images must be at most {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
 
-pagination_params = CommonQueryParams
\ No newline at end of file
+    if video:
+        if video.content_type not in ALLOWED_VIDEO_TYPES:
+            raise HTTPException(400, "Only MP4 or MOV videos allowed")
+        if _upload_size(video) > MAX_VIDEO_BYTES:
+            raise HTTPException(400, f"Videos must be at most {MAX_VIDEO_BYTES // (1024 * 1024)} MB")
@@ -1,40 +1,60 @@
 # app/api/routers/admin.py
-from fastapi import APIRouter, Depends
-from typing import List
+import hashlib
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import BaseModel
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_session
 from app.core.auth import require_admin
 from app.db.models import User, Complaint
 from app.schemas.auth import UserPublic
-from app.api.deps import pagination_params
+from app.schemas.complaints import ComplaintRead
+from app.schemas.pagination import CursorPage
 from app.db.repositories.base import BaseRepository
 
 router = APIRouter()
 complaint_repo = BaseRepository(Complaint)
 user_repo = BaseRepository(User)
 
-@router.get("/users", response_model=List[UserPublic])
+
+def _conditional_page(request: Request, page: BaseModel) -> Response:
+    """Serialize a page once, tag it with a weak ETag and answer 304 if the client already has it."""
+    body = page.model_dump_json().encode()
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/users", response_model=CursorPage[UserPublic])
 async def get_all_users(
+    request: Request,
     session: AsyncSession = Depends(get_session),
-    pagination: pagination_params = Depends(),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    limit: int = Query(100, ge=1, le=200),
     current_admin: User = Depends(require_admin)
 ):
     """
     (Admin) Get a list of all users.
     """
-    users = await user_repo.get_all(session, skip=pagination.skip, limit=pagination.limit)
-    return users
+    users, next_cursor = await user_repo.get_page(session, after_id=cursor, limit=limit)
+    page = CursorPage[UserPublic].model_validate({"items": users, "next_cursor": next_cursor}, from_attributes=True)
+    return _conditional_page(request, page)
 
 
-@router.get("/complaints", response_model=List[Complaint])
+@router.get("/complaints", response_model=CursorPage[ComplaintRead])
 async def get_all_complaints(
+    request: Request,
     session: AsyncSession = Depends(get_session),
-    pagination: pagination_params = Depends(),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    limit: int = Query(100, ge=1, le=200),
     current_admin: User = Depends(require_admin)
 ):
     """
     (Admin) Get all filed complaints.
     """
-    complaints = await complaint_repo.get_all(session, skip=pagination.skip, limit=pagination.limit)
-    return complaints
\ No newline at end of file
+    complaints, next_cursor = await complaint_repo.get_page(session, after_id=cursor, limit=limit)
+    page = CursorPage[ComplaintRead].model_validate({"items": complaints, "next_cursor": next_cursor}, from_attributes=True)
+    return _conditional_page(request, page)
@@ -1,24 +1,28 @@
+import os
 from typing import Annotated, Literal, Optional
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status, Response, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status, Response, Query
 from datetime import timedelta
-from app.core.cloudinary import cloudinary
-import cloudinary.uploader
-import jwt, random
+import jwt
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlalchemy.orm import lazyload
 
 from app.services.user_service import UserService
-from app.errors import EmailAlreadyVerified, InvalidToken, UserLoggedOut
+from app.errors import InvalidToken, UserLoggedOut
 from app.core.auth import (
     create_access_token,
+    decode_google_id_token,
     get_current_user_dependency,
+    get_current_user_orm_dependency,
+    revoke_token,
     verify_email_response,
-    verify_password,
-    generate_passwd_hash
+    verify_password_cached,
+    generate_passwd_hash_async,
+    generate_verification_token,
+    hash_verification_token,
 )
 from app.db.session import get_session, logger
-from app.db.repositories.user_repo import  student_profile_repo, user_repo
+from app.db.repositories.user_repo import  institution_profile_repo, institution_repo, student_profile_repo, user_repo
 from app.schemas.auth import (
     DeleteResponseModel,
     ForgotPasswordModel,
@@ -37,12 +41,22 @@ from app.schemas.auth import (
     LoginResponseModel,
     VerificationMailSchemaResponse
 )
+from app.schemas.pagination import CursorPage
+from app.services.media_service import media_service
+from app.tasks.queue import enqueue_job_after_commit
 from app.db.models import InstitutionProfile, StudentProfile, User, Institution, UserRole
 from app.core.config import settings
 from app.utils.resend_email import MailService
 import resend
 
 router = APIRouter()
+MAX_PROFILE_PICTURE_BYTES = 5_000_000
+# content type -> (allowed extensions, magic-byte prefix)
+PROFILE_PICTURE_FORMATS = {
+    "image/png": ({"png"}, b"\x89PNG\r\n\x1a\n"),
+    "image/jpeg": ({"jpg", "jpeg"}, b"\xff\xd8\xff"),
+}
+# UserService holds no state, so one instance serves every request
 user_service = UserService()
 mail_service = MailService(resend=resend, settings=settings)  # resend client injected later
 
@@ -54,50 +68,46 @@ mail_service = MailService(resend=resend, settings=settings)  # resend client in
 async def register_user(
     request: Request,
     user_in: UserCreateGeneralModel,
-    bg_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session)
 ):
     """
     Register a new user.
 
     Steps:
-    1. Check if the email already exists in the database.
-    2. Hash the user’s password.
-    4. Create a unique verification token.
-    5. Save the user to the database.
-    6. Send verification email in the background.
+    1. Hash the user’s password.
+    2. Create a unique verification token.
+    3. Insert the user, relying on the unique email constraint to reject duplicates.
+    4. Queue the verification email for the background worker.
 
     Args:
         user_in (UserCreateGeneralModel): Input model with user registration data.
-        bg_tasks (BackgroundTasks): FastAPI background tasks for async email sending.
         session (AsyncSession): SQLAlchemy async session.
 
     Returns:
         RegisterResponseModel: Status, message, and created user data.
     """
 
-    db_user = await user_repo.get_by_email(session, email=user_in.email)
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered."
-        )
-
-    hashed_password = generate_passwd_hash(user_in.password)
+    # Password hashing is CPU-bound; hash in a worker thread so the event loop keeps serving
+    hashed_password = await generate_passwd_hash_async(user_in.password)
 
-    verification_token = f"{random.randint(1000, 9999)}"
-    print("\n\n\nVerification token generated:", verification_token)
+    verification_token = generate_verification_token()
 
     user_obj = User(
         email=user_in.email,
         full_name=user_in.full_name,
-        verification_token=verification_token,
+        verification_token=hash_verification_token(verification_token),
         hashed_password=hashed_password,
         role=user_in.role
     )
 
-    created_user = await user_repo.create(session, obj_in=user_obj)
-    logger.info(f"Created user {created_user.id}")
+    # Single INSERT ... ON CONFLICT round-trip; no SELECT pre-check to race against
+    created_user = await user_repo.create_if_email_available(session, obj_in=user_obj)
+    if created_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered."
+        )
+    logger.info("Created user %s", created_user.id)
 
 
     # Run email in background
@@ -114,13 +124,21 @@ async def register_user(
     # # Run email in background
     # schedule_email(bg_tasks, email_data)
 
-    # Send verification email in the background
-    bg_tasks.add_task(mail_service.send_verification_email, created_user.email, str(created_user.full_name), verification_token)
+    # Hand the verification email to the worker; the token digest doubles as the job id
+    # so a retried request cannot queue the same email twice. The user is already
+    # committed, so a queue outage is only logged: /resend-verification-token recovers it.
+    await enqueue_job_after_commit(
+        "send_verification_email",
+        created_user.email,
+        str(created_user.full_name),
+        verification_token,
+        _job_id=f"verify-email:{created_user.verification_token}",
+    )
 
     return RegisterResponseModel(
         status=True,
         message="User created successfully, Please check your mail to verify your email address.",
-        data=UserCreateRead.model_validate(created_user)
+        data=UserCreateRead.from_user(created_user)
     )
 
 
@@ -139,11 +157,9 @@ async def verify_email(
     Verify a user's email address using a token.
 
     Steps:
-    1. Find user by verification token.
-    2. Check if email is already verified.
-    3. Update verification status and remove token.
-    4. Commit changes to the database.
-    5. Generate access token for verified user.
+    1. Atomically mark the token's unverified owner as verified and clear the token.
+    2. If nothing matched, report an already-verified email or an unknown token.
+    3. Generate access token for verified user.
 
     Args:
         session (AsyncSession): SQLAlchemy async session.
@@ -153,15 +169,7 @@ async def verify_email(
     Returns:
         Response: FastAPI response with access token if successful.
     """
-    user = await user_service.verify_token(token, session)
-
-    if user.is_verified:
-        raise EmailAlreadyVerified()
-
-    user.is_verified = True
-    user.verification_token = None
-    await session.commit()
-    await session.refresh(user)
+    user = await user_service.verify_email(token, session)
 
     campustalk_access_token = create_access_token(user=user)
     response = verify_email_response(user, campustalk_access_token, response)
@@ -171,25 +179,43 @@ async def verify_email(
 
 @router.post("/profile/picture", response_model=LoginResponseModel)
 async def upload_profile_picture(
-    current_user: Annotated[TokenUser, Depends(get_current_user_dependency(settings=settings))],
+    current_user: Annotated[User, Depends(get_current_user_orm_dependency(settings=settings))],
+    request: Request,
     session: AsyncSession = Depends(get_session),
     file: UploadFile = File(...),
 ):
-    allowed_extensions = ["jpg", "jpeg", "png"]
-    file_extension = file.filename.split(".")[-1].lower()
+    # Reject oversized bodies before touching the file or Cloudinary
+    content_length = request.headers.get("content-length")
+    size = file.size if file.size is not None else int(content_length or 0)
+    if size > MAX_PROFILE_PICTURE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Image too large. Maximum size is 5MB."
+        )
 
-    if file_extension not in allowed_extensions:
+    stem, ext = os.path.splitext(file.filename or "")
+    ext = ext[1:].lower()
+    extensions, magic = PROFILE_PICTURE_FORMATS.get(file.content_type, (set(), b""))
+
+    # Sniff the header so a mislabelled file fails here rather than at Cloudinary
+    header = await file.read(16)
+    await file.seek(0)
+
+    if ext not in extensions or not header.startswith(magic):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid file type. Only jpg, jpeg, and png are allowed."
         )
 
-    # Upload file to Cloudinary
+    # Upload file to Cloudinary over its REST API on the event loop, sending the spooled
+    # file in chunks instead of reading it into memory.
     try:
-        upload_result = cloudinary.uploader.upload(
+        upload_result = await media_service.upload_to_cloudinary(
             file.file,
             folder="profile_pictures",
-            public_id=f"{current_user.id}_{file.filename.split('.')[0]}"
+            resource_type="image",
+            filename=file.filename,
+            public_id=f"{current_user.id}_{stem}"
         )
         image_url = upload_result.get("secure_url")
 
@@ -200,31 +226,29 @@ async def upload_profile_picture(
         )
 
     # Update user's profile picture in DB
-    user = await user_repo.get_by_email(session, email=current_user.email)
+    user = current_user
     user.profile_picture = image_url
     await session.commit()
-    await session.refresh(user)
 
-
-    print("\n\nPROFILE PICTURE:", user.profile_picture)
     return LoginResponseModel(
         status=True,
         message="Profile picture uploaded successfully",
-        data=UserCreateRead.model_validate(user)
+        data=UserCreateRead.from_user(user)
     )
 
 
 
 
 # Get all institutions
-@router.get("/institutions", response_model=list[Institution])
+@router.get("/institutions", response_model=CursorPage[Institution])
 async def get_institutions(
-    session: Annotated[AsyncSession, Depends(get_session)]
+    session: Annotated[AsyncSession, Depends(get_session)],
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
 ):
-    """Get a list of all institutions."""
-    result = await session.execute(select(Institution))
-    institutions = result.scalars().all()
-    return [institution for institution in institutions]
+    """Get a page of institutions, ordered by id."""
+    institutions, next_cursor = await institution_repo.get_page(session, after_id=cursor, limit=limit)
+    return {"items": institutions, "next_cursor": next_cursor}
 
 
 
@@ -272,42 +296,48 @@ async def create_student_profile(
             detail="Institution cannot create student profile."
         )
 
-    db_user = await student_profile_repo.get_by_user_id(session, user_id=current_user.id)
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Student profile already exists."
+    # Snapshot the institution's display fields onto the profile, once
+    institution = None
+    if student_profile_in.institution_id:
+        institution = await institution_repo.get(
+            session, student_profile_in.institution_id, options=[lazyload("*")]
         )
-    
+
     student_obj = StudentProfile(
         user_id=current_user.id,
         institution_id=student_profile_in.institution_id,
-        institution_name=student_profile_in.institution_name,
+        institution_name=student_profile_in.institution_name or (institution.institution_name if institution else None),
+        institution_profile_picture=institution.institution_profile_picture if institution else None,
+        institution_website=institution.institution_website if institution else None,
         matric_number=student_profile_in.matric_number,
         faculty=student_profile_in.faculty,
         department=student_profile_in.department,
         educational_level=student_profile_in.educational_level,
     )
-    created_student = await student_profile_repo.create(session, obj_in=student_obj)
-
-    user = await user_repo.get_by_email(session, email=current_user.email)
-    user.role = UserRole.STUDENT
-    session.add(user)       # <-- make sure SQLAlchemy tracks this change
-    await session.commit()  # <-- persist it to DB
-    await session.refresh(user)
+    # INSERT ... ON CONFLICT (user_id) replaces the existence pre-check; the insert and
+    # the role UPDATE ... RETURNING then share one commit with no refreshes
+    created_student = await student_profile_repo.insert(session, obj_in=student_obj, conflict_columns=["user_id"])
+    if created_student is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Student profile already exists."
+        )
+    # lazyload("*"): only columns are read back, so skip the User's selectin collections
+    user = await user_repo.update(
+        session, id=current_user.id, values={"role": UserRole.STUDENT}, options=[lazyload("*")]
+    )
+    await session.commit()
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     new_access_token = create_access_token(user=user, expires_delta=access_token_expires)
     response = verify_email_response(user, new_access_token, response)
 
-    await session.commit()
-
-    logger.info(f"Created student {created_student.id}")
+    logger.info("Created student %s", created_student.id)
 
     return LoginResponseModel(
         status=True,
         message="Student profile created successfully",
-        data=StudentProfileRead(
+        data=StudentProfileRead.model_construct(
             profile_picture=user.profile_picture,
             matric_number=created_student.matric_number,
             faculty=created_student.faculty,
@@ -348,7 +378,6 @@ async def create_institution_profile(
     Returns:
         LoginResponseModel: Status, message, and created institution profile data.
     """
-    print(institution_profile_in, "\n\n")
     if not current_user.is_verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -361,33 +390,13 @@ async def create_institution_profile(
             detail="Student cannot create institution profile."
         )
 
-    # Check if institution profile already exists. do a direct query to the iinstitutionProfile table
-    query = select(InstitutionProfile).where(InstitutionProfile.user_id == current_user.id)
-    result = await session.execute(query)
-    db_user = result.scalar_one_or_none()
-
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Institution profile already exists."
-        )
-
-    institution_obj_profile = InstitutionProfile(
-        user_id=current_user.id,
-        institution_id= institution_profile_in.institution_id,
-        institution_name=institution_profile_in.institution_name,
-        institution_email=institution_profile_in.institution_email
+    # 1-2. Update the User Role and get the row back in one round-trip
+    user = await user_repo.update(
+        session, id=current_user.id, values={"role": UserRole.INSTITUTION}, options=[lazyload("*")]
     )
-
-    # 1. Fetch the user object from the DB to modify it
-    user = await user_repo.get_by_email(session, email=current_user.email)
     if not user:
          raise HTTPException(status_code=404, detail="User not found")
 
-    # 2. Update the User Role
-    user.role = UserRole.INSTITUTION
-    session.add(user)
-
     # 3. Create the InstitutionProfile object
     institution_obj_profile = InstitutionProfile(
         user_id=user.id, # Use user.id directly
@@ -397,30 +406,38 @@ async def create_institution_profile(
         profile_picture=user.profile_picture # Sync the picture here
     )
 
-    # 4. Add the profile to the session
-    session.add(institution_obj_profile)
+    # 4. INSERT ... ON CONFLICT (user_id) RETURNING doubles as the "already exists" check
+    institution_obj_profile = await institution_profile_repo.insert(
+        session, obj_in=institution_obj_profile, conflict_columns=["user_id"]
+    )
+    if institution_obj_profile is None:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Institution profile already exists."
+        )
 
     # 5. Commit EVERYTHING at once
     # This ensures both the user role update and profile creation succeed together
     await session.commit()
-    
-    # 6. Refresh to get IDs and generated fields
-    await session.refresh(user)
-    await session.refresh(institution_obj_profile)
 
-    # 7. Generate new token with updated role
+    # 6. Generate new token with updated role
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     new_access_token = create_access_token(user=user, expires_delta=access_token_expires)
     
     # This helper usually sets the cookie in the response
     verify_email_response(user, new_access_token, response)
 
-    logger.info(f"Created institution profile {institution_obj_profile.id} for user {user.id}")
+    logger.info("Created institution profile %s for user %s", institution_obj_profile.id, user.id)
 
     return LoginResponseModel(
         status=True,
         message="Institution profile created successfully",
-        data=InstitutionProfileRead.model_validate(institution_obj_profile)
+        data=InstitutionProfileRead.model_construct(
+            id=institution_obj_profile.id,
+            institution_name=institution_obj_profile.institution_name,
+            institution_email=institution_obj_profile.institution_email,
+        )
     )
 
 
@@ -455,7 +472,7 @@ async def login_for_access_token(
     """
     user = await user_repo.get_by_email(session, email=form_data.email)
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_cached(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -464,8 +481,6 @@ async def login_for_access_token(
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     campustalk_access_token = create_access_token(user=user, expires_delta=access_token_expires)
-    print("RAW USER DICT:", user.__dict__)
-    print("PROFILE PICTURE ATTR:", getattr(user, "profile_picture", "MISSING"))
     return verify_email_response(user=user, campustalk_access_token=campustalk_access_token, response=response)
 
 
@@ -482,6 +497,7 @@ async def logout(
     # check if the cookie exists
     if "campustalk_access_token" not in request.cookies:
         raise UserLoggedOut()
+    revoke_token(request.cookies["campustalk_access_token"])
     response.delete_cookie(key="campustalk_access_token", samesite="none", secure=True)
 
     return DeleteResponseModel(
@@ -503,34 +519,30 @@ async def read_users_me(
     If the user has an institution profile, include institution profile details.
     """
 
-    user_data = await user_repo.get_by_email(session, email=current_user.email)
+    # One joined SELECT for the user, its profiles and the student's institution
+    user_data = await user_repo.get_with_profiles(session, user_id=current_user.id)
     result = {
         "user": current_user.dict(),
         "profile_picture": user_data.profile_picture if user_data else None
     }
+    if user_data is None:
+        return result
 
     # Check if user is a student and has a profile
     if current_user.role == UserRole.STUDENT:
-        query = select(StudentProfile).where(StudentProfile.user_id == current_user.id)
-        student_profile = (await session.execute(query)).scalar_one_or_none()
+        student_profile = user_data.student_profile
         if student_profile:
             result["student_profile"] = StudentProfileRead.model_validate(student_profile).model_dump()
-            # Include the institution info if available
-            if student_profile.institution_id:
-                inst_query = select(Institution).where(Institution.id == student_profile.institution_id)
-                institution = (await session.execute(inst_query)).scalar_one_or_none()
-                if institution:
-                    result["institution"] = institution.model_dump()
+            # Include the institution info if available; it comes from the joined row, not
+            # the snapshot copied onto the profile, so institution edits show up here
+            if student_profile.institution:
+                result["institution"] = student_profile.institution.model_dump()
 
     # Check if user is an institution and has a profile
     elif current_user.role == UserRole.INSTITUTION:
-        print(f"\n\n\nThis is the {UserRole.INSTITUTION}")
-        query = select(InstitutionProfile).where(InstitutionProfile.user_id == current_user.id)
-        institution_profile = (await session.execute(query)).scalar_one_or_none()
-        print(f"\n\nThis is the school profile: {institution_profile}\n")
+        institution_profile = user_data.institution_profile
         if institution_profile:
             result["institution_profile"] = InstitutionProfileRead.model_validate(institution_profile).model_dump()
-            print(result["institution_profile"])
 
     return result
 
@@ -550,10 +562,16 @@ async def set_onboarding_status(
         "false": False
     }
 
-    user = await user_repo.get_by_email(session, email=current_user.email)
-    user.is_onboarding_completed = map_onboarding_status[is_onboarding_completed]
+    # One UPDATE ... RETURNING instead of load + mutate + commit
+    user = await user_repo.update(
+        session,
+        id=current_user.id,
+        values={"is_onboarding_completed": map_onboarding_status[is_onboarding_completed]},
+        options=[lazyload("*")],
+    )
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     await session.commit()
-    await session.refresh(user)
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     campustalk_access_token = create_access_token(user=user, expires_delta=access_token_expires)
@@ -562,7 +580,7 @@ async def set_onboarding_status(
     return LoginResponseModel(
         status=True,
         message="Onboarding is set to true successfully",
-        data=UserCreateRead.model_validate(user)
+        data=UserCreateRead.from_user(user)
     )
 
 
@@ -578,14 +596,12 @@ async def token(
         This is responsible for exchanging the google code for an access token and validating the token.
         Send the user data to the user and sets access token in cookies.
     """
-    print("The code is", form_data.code)
     google_token = form_data.code
 
     try:
-        user_data = jwt.decode(google_token, options={"verify_signature": False})
-        print("The decoded token is", user_data)
+        user_data = await decode_google_id_token(google_token)
     
-    except jwt.ExpiredSignatureError:
+    except jwt.PyJWTError:
         raise InvalidToken()
 
     response = await validate(user_data, request, response, session)
@@ -600,7 +616,6 @@ async def resend_verification_token(
     email: str = Query(..., description="Email of the user to resend verification token"),
 ):
     """Resend the verification token to the user's email."""
-    user_service = UserService()
     response = await user_service.resend_verification_email(email, session)
 
     return response
@@ -613,7 +628,6 @@ async def forgot_password(
     session: Annotated[AsyncSession, Depends(get_session)],
 ):
     """Reset the password for the user."""
-    user_service = UserService()
     response = await user_service.forgot_password(payload, session)
     return response
 
@@ -627,27 +641,9 @@ async def reset_password_redirect(
 ):
     """Verify user's email using the provided token."""
     
-    # Initialize UserService instance
-    user_service = UserService()
-    
-    # Retrieve user based on the verification token
-    user = await user_service.verify_token(token, session)
-    
-    if not user:
-        raise InvalidToken()
-    
-    # Update user verification status
-    user.is_verified = True
-    user.verification_token = None
-    
-    # Commit changes to the database
-    await session.commit()
-    await session.refresh(user)
-    
-    #  Reset the password
-    response = await user_service.reset_password(user, payload, session)
-            
-    return response
+    # One UPDATE keyed on the (unique) token digest replaces load, mutate, commit,
+    # refresh, then a second mutate/commit/refresh for the password
+    return await user_service.reset_password_with_token(token, payload, session)
 
 
 
@@ -657,7 +653,6 @@ async def delete_user(
     response: Response,
     session: Annotated[AsyncSession, Depends(get_session)],
 ):
-    user_service = UserService()
     try:
         await user_service.delete_user(current_user, session)
         response.delete_cookie(key="campustalk_access_token")
@@ -674,18 +669,12 @@ async def delete_user(
 
 
 async def validate(user_data: dict, request:  Optional[Request] = None , response: Optional[Response] = None, session: Optional[AsyncSession] = None):
-    print("The user data from the Google payload:", user_data)
-    user_service = UserService()
     email = user_data.get("email")
-    print("Checking for user with email:", email)
 
     try:
         user = await user_service.get_user_by_email(email, session)
-        print("User exists:", user)
     
         if user is None:
-            print("User not found. Creating new user...")
-
             user_model = UserCreateGeneralModel(
                 full_name=user_data.get("name"),
                 username=user_data.get("email").split("@")[0],
@@ -694,16 +683,14 @@ async def validate(user_data: dict, request:  Optional[Request] = None , respons
             )
 
             user = await user_service.create_user(user_model, session, is_google=True)
-            print("User created successfully:", user)
+            logger.info("Created user %s via Google sign-in", user.id)
 
 
     except Exception as e:
-        print("Unexpected error:", e)
         raise e
 
     # Now generate the access token
     access_token_expires = timedelta(minutes=300)
-    print("Creating access token for user:", user)
     campustalk_access_token = create_access_token(user=user, expires_delta=access_token_expires)
 
 
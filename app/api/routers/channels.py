@@ -1,24 +1,25 @@
 # app/api/routers/channels.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 import uuid
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import lazyload
 
 from app.db.session import get_session
 from app.core.auth import get_current_user_dependency
-from app.db.models import  Channel, Post, UserChannelLink
+from app.db.models import  Channel, UserChannelLink
 from app.core.config import settings
+from app.core.cache import get_like_deltas
 from app.schemas.channel import ChannelCreate, ChannelPublic
 from app.schemas.auth import TokenUser
-from app.schemas.post import PostPublic
+from app.schemas.post import PostPublic, dump_posts_json
 from app.db.repositories.base import BaseRepository
-from app.api.deps import pagination_params
+from app.db.repositories.post_repo import post_repo
+from app.api.deps import cursor_headers, next_cursor, pagination_params
 
 router = APIRouter()
 channel_repo = BaseRepository(Channel)
-post_repo = BaseRepository(Post)
+channel_link_repo = BaseRepository(UserChannelLink)
 
 @router.post("/", response_model=ChannelPublic, status_code=status.HTTP_201_CREATED)
 async def create_channel(
@@ -31,16 +32,14 @@ async def create_channel(
     Create a new channel. The creator automatically becomes an admin member.
     """
     channel = Channel.from_orm(channel_in, update={"created_by": current_user.id})
-    
-    # Add creator as the first member and admin
+
+    # Both rows go out as INSERT ... RETURNING in one transaction; the response only
+    # needs the channel's columns, so its selectin collections are not loaded
+    channel = await channel_repo.insert(session, obj_in=channel, options=[lazyload("*")])
     link = UserChannelLink(user_id=current_user.id, channel_id=channel.id, is_admin=True)
-    channel.members.append(current_user) # This relationship is managed via the link model
-    
-    session.add(channel)
-    session.add(link)
+    await channel_link_repo.insert(session, obj_in=link)
     await session.commit()
-    await session.refresh(channel)
-    
+
     return channel
 
 @router.post("/{channel_id}/join", status_code=status.HTTP_204_NO_CONTENT)
@@ -52,18 +51,13 @@ async def join_channel(
     """
     Join a public channel.
     """
-    channel = await channel_repo.get(session, id=channel_id)
+    channel = await channel_repo.get(session, id=channel_id, options=[lazyload("*")])
     if not channel or channel.is_private:
         raise HTTPException(status_code=404, detail="Channel not found or is private")
 
-    # Check if user is already a member
-    statement = select(UserChannelLink).where(UserChannelLink.user_id == current_user.id, UserChannelLink.channel_id == channel_id)
-    result = await session.execute(statement)
-    if result.scalars().first():
-        return # Already a member, do nothing
-
+    # Already being a member is a no-op via ON CONFLICT instead of a SELECT beforehand
     link = UserChannelLink(user_id=current_user.id, channel_id=channel_id)
-    session.add(link)
+    await channel_link_repo.insert(session, obj_in=link, conflict_columns=["user_id", "channel_id"])
     await session.commit()
     return
 
@@ -80,14 +74,12 @@ async def get_posts_in_channel(
     Get the feed for a specific channel.
     """
     # In a real app, you'd also check if the user is a member of a private channel
-    statement = (
-        select(Post)
-        .where(Post.channel_id == channel_id)
-        .options(selectinload(Post.author))
-        .order_by(Post.created_at.desc())
-        .offset(pagination.skip)
-        .limit(pagination.limit)
+    posts = await post_repo.get_channel_feed(
+        session, channel_id=channel_id, skip=pagination.skip, limit=pagination.limit, after=pagination.after
     )
-    result = await session.execute(statement)
-    posts = result.scalars().all()
-    return posts
\ No newline at end of file
+    like_deltas = await get_like_deltas([post.id for post in posts])
+    # Already validated/encoded here, so FastAPI's response_model pass is skipped
+    return Response(
+        dump_posts_json(posts, like_deltas), media_type="application/json",
+        headers=cursor_headers(next_cursor(posts, pagination.limit)),
+    )
\ No newline at end of file
@@ -1,12 +1,22 @@
+import hashlib
 import uuid
 from fastapi import APIRouter, HTTPException
 
 from app.chatbot.agent import graph
 from app.chatbot.schema import ChatRequest, ChatResponse
+from app.core.cache import cache_get, cache_set
 
 
 router = APIRouter()
 
+# Answers to first messages (no thread_id, so no prior context) depend only on the
+# text, and the model runs at temperature 0; repeat FAQ-style questions reuse them
+ANSWER_CACHE_TTL = 900
+
+
+def _answer_cache_key(message: str) -> str:
+    return "chat:" + hashlib.sha256(message.strip().lower().encode()).hexdigest()
+
 
 @router.post("/", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
@@ -21,12 +31,22 @@ async def chat_endpoint(request: ChatRequest):
   try:
     # thread_id allows for session-based memory
     config = {"configurable": {"thread_id": request.thread_id or str(uuid.uuid4())}}
-    
-    input_message = {"messages": [("user", request.message)]}
-    result = await graph.ainvoke(input_message, config)
-    
-    # Get the final message from the history
-    final_answer = result["messages"][-1].content
+
+    cache_key = _answer_cache_key(request.message) if request.thread_id is None else None
+    final_answer = await cache_get(cache_key) if cache_key else None
+    if final_answer is not None:
+      # Record the exchange on the new thread so follow-ups still have the context
+      await graph.aupdate_state(
+          config, {"messages": [("user", request.message), ("ai", final_answer)]}, as_node="agent"
+      )
+    else:
+      input_message = {"messages": [("user", request.message)]}
+      result = await graph.ainvoke(input_message, config)
+
+      # Get the final message from the history
+      final_answer = result["messages"][-1].content
+      if cache_key:
+        await cache_set(cache_key, final_answer, ANSWER_CACHE_TTL)
     
     return ChatResponse(
         response=final_answer,
@@ -39,11 +39,10 @@ async def create_comment(
     
     # Create notification for the post author (if not the same user)
     if post.author_id != current_user.id:
-        await notification_service.create_notification(
-            session,
+        notification_service.create_notification_in_background(
             user_id=post.author_id,
             notification_type=NotificationType.COMMENT,
-            content={"message": f"{current_user.username} commented on your post.", "post_id": str(post_id)}
+            content={"message": f"{current_user.full_name} commented on your post.", "post_id": str(post_id)}
         )
     return new_comment
 
@@ -1,24 +1,27 @@
 # app/api/routers/communities.py
 from tokenize import Token
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 import uuid
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 
 from app.db.session import get_session
 from app.core.auth import get_current_user_dependency
-from app.db.models import User, Community, Post
-from app.schemas.post import PostPublic
+from app.core.cache import get_like_deltas
+from app.db.models import User, Community, UserCommunityLink
+from app.schemas.post import PostPublic, dump_posts_json
 from app.schemas.auth import TokenUser
 from app.schemas.channel import CommunityCreate, CommunityPublic
 from app.db.repositories.base import BaseRepository
-from app.api.deps import pagination_params
+from app.db.repositories.post_repo import post_repo
+from app.api.deps import cursor_headers, next_cursor, pagination_params
 from app.core.config import settings
 
 router = APIRouter()
 community_repo = BaseRepository(Community)
+community_link_repo = BaseRepository(UserCommunityLink)
 
 @router.post("/", response_model=CommunityPublic, status_code=status.HTTP_201_CREATED)
 async def create_community(
@@ -44,18 +47,22 @@ async def join_or_leave_community(
     """
     Toggle membership in a community (join or leave).
     """
-    community = await session.get(Community, community_id, options=[selectinload(Community.members)])
-    if not community:
-        raise HTTPException(status_code=404, detail="Community not found")
-        
-    user_is_member = any(member.id == current_user.id for member in community.members)
+    # Leaving is a single DELETE ... RETURNING; only if nothing was deleted do we join.
+    # The members collection is never loaded.
+    result = await session.execute(
+        delete(UserCommunityLink)
+        .where(UserCommunityLink.user_id == current_user.id, UserCommunityLink.community_id == community_id)
+        .returning(UserCommunityLink.user_id)
+    )
+    if result.first() is None:
+        link = UserCommunityLink(user_id=current_user.id, community_id=community_id)
+        try:
+            await community_link_repo.insert(session, obj_in=link, conflict_columns=["user_id", "community_id"])
+        except IntegrityError:
+            # FK violation: the community does not exist
+            await session.rollback()
+            raise HTTPException(status_code=404, detail="Community not found")
 
-    if user_is_member:
-        community.members.remove(current_user)
-    else:
-        community.members.append(current_user)
-    
-    session.add(community)
     await session.commit()
     return
 
@@ -69,14 +76,12 @@ async def get_posts_in_community(
     """
     Get the feed for a specific community.
     """
-    statement = (
-        select(Post)
-        .where(Post.community_id == community_id)
-        .options(selectinload(Post.author))
-        .order_by(Post.created_at.desc())
-        .offset(pagination.skip)
-        .limit(pagination.limit)
+    posts = await post_repo.get_community_feed(
+        session, community_id=community_id, skip=pagination.skip, limit=pagination.limit, after=pagination.after
     )
-    result = await session.execute(statement)
-    posts = result.scalars().all()
-    return posts
\ No newline at end of file
+    like_deltas = await get_like_deltas([post.id for post in posts])
+    # Already validated/encoded here, so FastAPI's response_model pass is skipped
+    return Response(
+        dump_posts_json(posts, like_deltas), media_type="application/json",
+        headers=cursor_headers(next_cursor(posts, pagination.limit)),
+    )
\ No newline at end of file
@@ -23,10 +23,10 @@ async def file_complaint(
     """
     File a complaint against a post, comment, or user.
     """
-    num_targets = sum(
-        1 for item in 
-        [complaint_in.reported_post_id, complaint_in.reported_comment_id, complaint_in.reported_user_id] 
-        if item is not None
+    num_targets = (
+        (complaint_in.reported_post_id is not None)
+        + (complaint_in.reported_comment_id is not None)
+        + (complaint_in.reported_user_id is not None)
     )
     if num_targets != 1:
         raise HTTPException(
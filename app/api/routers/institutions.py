@@ -1,43 +1,59 @@
-import cloudinary
-import cloudinary.uploader
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, BackgroundTasks
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
-from sqlalchemy.orm import selectinload
 from typing import List, Optional
 
-from app.api.deps import pagination_params
+from app.api.deps import cursor_headers, feed_pagination_params, next_cursor, pagination_params, validate_media_uploads
 from app.db.session import get_session
-from app.core.auth import get_current_user_dependency
+from app.core.auth import get_current_user_dependency, require_institution_admin, user_from_token
+from app.core.cache import FEED_CACHE_TTL, cached_json, cached_page, get_like_deltas, institution_namespace, invalidate_post_feeds, versioned_key
 from app.core.config import settings
-from app.db.models import Institution, Media, MediaType, Post, PostType, UploadedDocument, UserRole, PostPrivacy, StudentProfile
+from app.db.models import Institution, Post, PostType, UploadedDocument, UserRole, PostPrivacy, StudentProfile
 from app.schemas.institution import InstitutionPublic, UploadedDocumentCreate, UploadedDocumentPublic, InstitutionTimelineResponse
-from app.schemas.post import PostPublic
+from app.schemas.post import PostPublic, dump_posts_json
 from app.schemas.auth import TokenUser
 from app.db.repositories.institution_repo import institution_repo
-from app.tasks.media_tasks import process_video_thumbnail
+from app.db.repositories.post_repo import post_repo
+from app.tasks.media_tasks import discard_staged_uploads, schedule_media_uploads, stage_media_uploads
 # from app.services.rag_service import ingest_document_background
 
 router = APIRouter()
 
 
-@router.get("/{institution_id}", response_model=InstitutionPublic)
-async def get_institution(
+async def get_institution_or_404(
     institution_id: str,
     session: AsyncSession = Depends(get_session),
-):
+) -> Institution:
+    """
+    Path dependency: load the institution once per request (FastAPI caches the result for
+    every consumer) or 404. The session is the request's scoped one, so later
+    session.get calls for the same id are identity-map hits.
+    """
     inst = await institution_repo.get(session, id=institution_id)
     if not inst:
         raise HTTPException(status_code=404, detail="Institution not found")
+    return inst
+
+
+@router.get("/{institution_id}", response_model=InstitutionPublic)
+async def get_institution(
+    institution_id: str,
+    session: AsyncSession = Depends(get_session),
+):
+    async def load() -> str:
+        # Both totals ride along as scalar subqueries: one round-trip on the request's connection
+        inst, posts_count, students_count = await institution_repo.get_with_counts(session, institution_id)
+        if not inst:
+            raise HTTPException(status_code=404, detail="Institution not found")
 
-    posts_count = await institution_repo.get_posts_count(session, inst)
-    students_count = len(inst.students) if hasattr(inst, "students") else 0
+        return InstitutionPublic.model_validate({
+            **inst.model_dump(),
+            "students_count": students_count,
+            "posts_count": posts_count,
+        }).model_dump_json()
 
-    return InstitutionPublic.model_validate({
-        **inst.model_dump(),
-        "students_count": students_count,
-        "posts_count": posts_count,
-    })
+    key = await versioned_key(institution_namespace(institution_id), "detail")
+    return Response(await cached_json(key, FEED_CACHE_TTL, load), media_type="application/json")
 
 
 
@@ -53,23 +69,25 @@ async def get_posts_by_institution(
     """
     Fetch all posts belonging to a specific institution by ID.
     """
-    stmt = (
-        select(Post)
-        .where(Post.school_scope == institution_id)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.media)
+    async def load() -> tuple[bytes, Optional[str]]:
+        posts = await post_repo.get_school_scope_feed(
+            session,
+            school_scope=institution_id,
+            post_type=post_type,
+            skip=pagination.skip,
+            limit=pagination.limit,
+            after=pagination.after,
         )
-        .order_by(Post.created_at.desc())
-    )
-    
-    if post_type:
-        stmt = stmt.where(Post.post_type == post_type)
+        like_deltas = await get_like_deltas([post.id for post in posts])
+        return dump_posts_json(posts, like_deltas), next_cursor(posts, pagination.limit)
 
-    stmt = stmt.offset(pagination.skip).limit(pagination.limit)
-    
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    key = await versioned_key(
+        institution_namespace(institution_id), "posts", post_type and post_type.value,
+        pagination.cursor or pagination.skip, pagination.limit,
+    )
+    body, cursor = await cached_page(key, FEED_CACHE_TTL, load)
+    # Already validated/encoded here, so FastAPI's response_model pass is skipped
+    return Response(body, media_type="application/json", headers=cursor_headers(cursor))
 
 
 
@@ -86,23 +104,14 @@ async def create_institution_post(
     video: Optional[UploadFile] = File(None),
     session: AsyncSession = Depends(get_session),
     background_tasks: BackgroundTasks = BackgroundTasks(),
+    inst: Institution = Depends(require_institution_admin),  # 1. PERMISSION CHECK
     current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
 ):
-    # 1. PERMISSION CHECK
-    if current_user.role not in [UserRole.INSTITUTION, UserRole.ADMIN]:
-        raise HTTPException(403, "Only institution accounts can create official posts")
-
-    is_admin = await institution_repo.is_user_institution_admin(session, current_user.id, institution_id)
-    if not is_admin and current_user.role != UserRole.ADMIN:
-        raise HTTPException(403, "You are not an admin for this institution")
-
     # 2. VALIDATE MEDIA (Same as general post)
-    if images and video:
-        raise HTTPException(400, "Cannot upload images and video together")
-    if post_type == PostType.REEL and not video:
-        raise HTTPException(400, "Reel post requires a video")
+    validate_media_uploads(images, video, post_type, content)
 
-    # 3. INITIALIZE POST
+    # 3. INITIALIZE POST (the id is generated client-side, so media can reference it
+    # before anything is written)
     privacy = PostPrivacy.PUBLIC if mirror_to_general else PostPrivacy.SCHOOL_ONLY
     post = Post(
         author_id=current_user.id,
@@ -111,64 +120,32 @@ async def create_institution_post(
         privacy=privacy,
         school_scope=institution_id, 
     )
-    session.add(post)
-    await session.flush() # Get post.id for media links
-
-    # 4. HANDLE IMAGE UPLOADS
-    media_objects: list[Media] = []
-    if images:
-        for img in images:
-            # You can extract this to a service.upload_media function
-            upload = cloudinary.uploader.upload(
-                img.file,
-                folder="posts/images",
-                resource_type="image",
-            )
-            media_objects.append(
-                Media(
-                    post_id=post.id,
-                    media_type=MediaType.IMAGE,
-                    url=upload["secure_url"],
-                    file_metadata={"format": upload.get("format"), "bytes": upload.get("bytes")}
-                )
-            )
-
-    # 5. HANDLE VIDEO UPLOADS
-    if video:
-        upload = cloudinary.uploader.upload(
-            video.file,
-            folder="posts/videos",
-            resource_type="video",
-        )
-        media_objects.append(
-            Media(
-                post_id=post.id,
-                media_type=MediaType.VIDEO,
-                url=upload["secure_url"],
-                file_metadata={"duration": upload.get("duration"), "bytes": upload.get("bytes")}
-            )
-        )
 
-    if media_objects:
-        session.add_all(media_objects)
-
-    # 6. ATOMIC COMMIT
-    await session.commit()
-    await session.refresh(post)
-
-    # 7. TRIGGER BACKGROUND TASKS (Reels)
-    if post_type == PostType.REEL and media_objects:
-        background_tasks.add_task(
-            process_video_thumbnail, # Assuming this is imported
-            post_id=post.id,
-            video_url=media_objects[0].url,
-        )
-
-    # 8. FETCH FULL OBJECT FOR RESPONSE
-    result = await session.execute(
-        select(Post).options(selectinload(Post.author), selectinload(Post.media)).where(Post.id == post.id)
+    # 4. STAGE MEDIA: spool the files to disk as PENDING rows; Cloudinary gets them
+    # after the response has gone out
+    staged = await stage_media_uploads(post.id, images=images, video=video)
+    media_objects = [media for media, _ in staged]
+
+    # 5. ATOMIC COMMIT: one INSERT ... RETURNING; the author is the caller (from the token)
+    # and the media list is what was just staged, so there is no refresh or re-select afterwards
+    try:
+        post = await post_repo.insert_with_author(session, post, media_objects, user_from_token(current_user))
+        await session.commit()
+    except BaseException:
+        # Nothing will upload the spooled files now
+        discard_staged_uploads(staged)
+        raise
+    await invalidate_post_feeds(institution_id)
+
+    # 6. TRIGGER BACKGROUND TASKS (uploads, then the thumbnail for reels)
+    schedule_media_uploads(
+        background_tasks,
+        staged,
+        thumbnail_post_id=post.id if post_type == PostType.REEL else None,
+        school_scope=post.school_scope,
     )
-    return result.scalar_one()
+
+    return post
 
 
 
@@ -177,23 +154,10 @@ async def create_institution_post(
 async def upload_document_for_rag(
     institution_id: str,
     doc_in: UploadedDocumentCreate,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
+    inst: Institution = Depends(require_institution_admin),
     current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
 ):
-    inst = await institution_repo.get(session, id=institution_id)
-    if not inst:
-        raise HTTPException(status_code=404, detail="Institution not found")
-
-    # Only institution users or admins can upload
-    if current_user.role not in (UserRole.INSTITUTION, UserRole.ADMIN):
-        raise HTTPException(status_code=403, detail="Not allowed to upload documents")
-
-    # Verify user is an admin/owner for this institution
-    is_admin = await institution_repo.is_user_institution_admin(session, current_user.id, institution_id)
-    if not is_admin and current_user.role != UserRole.ADMIN:
-        raise HTTPException(status_code=403, detail="You are not an admin for this institution")
-
     # Persist document record
     doc = UploadedDocument(
         institution_id=institution_id,
@@ -213,11 +177,9 @@ async def upload_document_for_rag(
 @router.get("/{institution_id}/documents", response_model=List[UploadedDocumentPublic])
 async def list_documents(
     institution_id: str,
+    inst: Institution = Depends(get_institution_or_404),
     session: AsyncSession = Depends(get_session),
 ):
-    inst = await institution_repo.get(session, id=institution_id)
-    if not inst:
-        raise HTTPException(status_code=404, detail="Institution not found")
     docs = await institution_repo.get_documents_for_institution(session, institution_id)
     return docs
 
@@ -247,68 +209,68 @@ async def delete_document(document_id: str, session: AsyncSession = Depends(get_
 @router.get("/timeline/my-institution", response_model=InstitutionTimelineResponse)
 async def get_my_institution_timeline(
     session: AsyncSession = Depends(get_session),
+    pagination: feed_pagination_params = Depends(),
     current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
 ):
     """
     Get the logged-in student's institution timeline.
-    Returns the institution details + all school-scoped posts for that institution.
+    Returns the institution details + a page of school-scoped posts for that institution.
     """
     # Only students can access this
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(status_code=403, detail="Only students can view institution timelines")
 
-    # Fetch student profile to get institution_id
-    statement = select(StudentProfile).where(StudentProfile.user_id == current_user.id).options(selectinload(StudentProfile.institution))
-    result = await session.execute(statement)
-    student_profile = result.scalars().first()
-
-    if not student_profile or not student_profile.institution_id:
-        raise HTTPException(status_code=404, detail="Student profile or institution not found")
-
-    # Get institution
-    institution = await institution_repo.get(session, id=student_profile.institution_id)
-    if not institution:
-        raise HTTPException(status_code=404, detail="Institution not found")
-
-    # Get posts for this institution (school-scoped posts only)
-    posts_statement = (
-        select(Post)
-        .where(Post.school_scope == institution.institution_name)
-        .options(selectinload(Post.author), selectinload(Post.media), selectinload(Post.comments))
-        .order_by(Post.created_at.desc())
+    # Everything below is keyed on the institution id, so fetch just that column rather
+    # than the profile row
+    institution_id = await session.scalar(
+        select(StudentProfile.institution_id).where(StudentProfile.user_id == current_user.id)
     )
-    posts_result = await session.execute(posts_statement)
-    posts = posts_result.scalars().all()
-
-    # Compute stats
-    posts_count = len(posts)
-    students_count = len(institution.students) if hasattr(institution, "students") else 0
+    if not institution_id:
+        raise HTTPException(status_code=404, detail="Student profile or institution not found")
 
-    # Build response
-    institution_data = InstitutionPublic.model_validate({
-        **institution.model_dump(),
-        "students_count": students_count,
-        "posts_count": posts_count,
-    })
+    async def load() -> tuple[str, Optional[str]]:
+        # Two round-trips on the request's connection: the institution with both totals as
+        # scalar subqueries, then the page of school-scoped posts
+        institution, posts_count, students_count = await institution_repo.get_with_counts(session, institution_id)
+        if not institution:
+            raise HTTPException(status_code=404, detail="Institution not found")
+        posts = await post_repo.get_institution_timeline(
+            session, institution_id=institution_id, skip=pagination.skip, limit=pagination.limit, after=pagination.after
+        )
 
-    posts_data = [PostPublic.model_validate(post) for post in posts]
+        # Build response: validate straight from the ORM rows and encode once
+        timeline = InstitutionTimelineResponse.model_validate(
+            {
+                "institution": {
+                    **institution.model_dump(),
+                    "students_count": students_count,
+                    "posts_count": posts_count,
+                },
+                "posts": posts,
+            },
+            from_attributes=True,
+        )
+        return timeline.model_dump_json(), next_cursor(posts, pagination.limit)
 
-    return InstitutionTimelineResponse(institution=institution_data, posts=posts_data)
+    # Same for every student of the institution, so the cache is per institution + page
+    key = await versioned_key(
+        institution_namespace(institution_id), "timeline", pagination.cursor or pagination.skip, pagination.limit
+    )
+    body, cursor = await cached_page(key, FEED_CACHE_TTL, load)
+    return Response(body, media_type="application/json", headers=cursor_headers(cursor))
 
 
 @router.post("/{institution_id}/chatbot")
 async def chatbot_query(
     institution_id: str,
     query: str,
+    inst: Institution = Depends(get_institution_or_404),
     session: AsyncSession = Depends(get_session),
     current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
 ):
     """Query the RAG chatbot for an institution."""
     # from app.services.rag_service import rag_service
 
-    inst = await institution_repo.get(session, id=institution_id)
-    if not inst:
-        raise HTTPException(status_code=404, detail="Institution not found")
 
     # result = await rag_service.query(institution_id, query, top_k=3)
     return {
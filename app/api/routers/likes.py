@@ -2,11 +2,14 @@
 from fastapi import APIRouter, Depends, status, HTTPException
 import uuid
 from sqlmodel import select
+from sqlalchemy import DateTime, delete, exists, func, literal, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.db.session import get_session
 from app.core.auth import get_current_user_dependency
+from app.core.cache import add_like_delta
 from app.db.models import User, Like, Post
 from app.core.config import settings
 from app.db.repositories.base import BaseRepository
@@ -22,22 +25,44 @@ async def toggle_like_post(
     session: AsyncSession = Depends(get_session),
     current_user: TokenUser = Depends(get_current_user_dependency(settings))
 ):
-    post = await post_repo.get(session, id=post_id, options=[selectinload(Post.author)])
-    if not post:
+    # One round-trip: the CTE removes an existing like and the INSERT only runs when it
+    # removed nothing. A missing post surfaces as an FK violation on the insert. The
+    # statement yields +1 (liked), -1 (unliked) or 0 (lost a race to a concurrent like).
+    unliked = (
+        delete(Like)
+        .where(Like.user_id == current_user.id, Like.post_id == post_id)
+        .returning(Like.id)
+        .cte("unliked")
+    )
+    like = Like(user_id=current_user.id, post_id=post_id)
+    liked = (
+        insert(Like)
+        .from_select(
+            ["id", "user_id", "post_id", "created_at"],
+            select(
+                literal(like.id), literal(like.user_id), literal(like.post_id), literal(like.created_at, DateTime(timezone=True))
+            ).where(~exists(select(unliked.c.id))),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"], index_where=Like.post_id.isnot(None))
+        .returning(Like.id)
+        .cte("liked")
+    )
+    statement = select(
+        select(func.count()).select_from(liked).scalar_subquery()
+        - select(func.count()).select_from(unliked).scalar_subquery()
+    )
+    try:
+        delta = await session.scalar(statement)
+    except IntegrityError:
+        await session.rollback()
         raise HTTPException(status_code=404, detail="Post not found")
-        
-    # Check if a like already exists
-    statement = select(Like).where(Like.user_id == current_user.id, Like.post_id == post_id)
-    result = await session.execute(statement)
-    existing_like = result.scalars().first()
-    
-    if existing_like:
-        # Unlike
-        await session.delete(existing_like)
+
+    await session.commit()
+    # post.like_count is normally not touched here; the worker flushes the Redis delta
+    # into it. Without Redis the delta goes straight to the row so the count can't drift.
+    if delta and not await add_like_delta(post_id, delta):
+        await session.execute(
+            update(Post).where(Post.id == post_id).values(like_count=Post.like_count + delta)
+        )
         await session.commit()
-    else:
-        # Like
-        like = Like(user_id=current_user.id, post_id=post_id)
-        await like_repo.create(session, obj_in=like)
-    
     return
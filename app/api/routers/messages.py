@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import exists, insert, literal, tuple_
+from sqlalchemy.orm import lazyload
 
 from app.db.session import get_session
 from app.core.auth import get_current_user_dependency
 from app.core.config import settings
 from app.db.models import Conversation, ConversationUserLink, Message, User
-from app.schemas.messages import ConversationCreate, ConversationPublic, MessageCreate, MessagePublic
+from app.schemas.messages import ConversationCreate, ConversationPublic, MessageCreate, MessagePublic, dump_conversations_json, dump_messages_json
 from app.schemas.auth import TokenUser
 from app.db.repositories.base import BaseRepository
+from app.api.deps import cursor_headers, decode_cursor, next_cursor
 
 router = APIRouter()
 conversation_repo = BaseRepository(Conversation)
@@ -25,26 +27,19 @@ async def create_conversation(
 ):
     """Create a new conversation and add members."""
     conv = Conversation(title=conversation_in.title, is_group=conversation_in.is_group, created_by=current_user.id)
-    session.add(conv)
-    await session.commit()
-    await session.refresh(conv)
-
-    # Add current user as member
-    link = ConversationUserLink(user_id=current_user.id, conversation_id=conv.id)
-    session.add(link)
+    conv = await conversation_repo.insert(session, obj_in=conv, options=[lazyload("*")])
 
-    # Add additional members if provided
-    if conversation_in.member_ids:
-        for uid in conversation_in.member_ids:
-            # skip if trying to add self again
-            if uid == current_user.id:
-                continue
-            user = await session.get(User, uid)
-            if user:
-                session.add(ConversationUserLink(user_id=uid, conversation_id=conv.id))
+    # Current user plus any requested members; ids that don't match a user are dropped
+    # by the INSERT ... SELECT itself, so there is no per-member lookup
+    member_ids = {current_user.id, *(conversation_in.member_ids or [])}
+    await session.execute(
+        insert(ConversationUserLink).from_select(
+            ["user_id", "conversation_id"],
+            select(User.id, literal(conv.id)).where(User.id.in_(member_ids)),
+        )
+    )
 
     await session.commit()
-    await session.refresh(conv)
     return conv
 
 
@@ -57,12 +52,12 @@ async def get_my_conversations(
         select(Conversation)
         .join(ConversationUserLink, Conversation.id == ConversationUserLink.conversation_id)
         .where(ConversationUserLink.user_id == current_user.id)
-        .options(selectinload(Conversation.members), selectinload(Conversation.messages))
+        .options(lazyload("*"))  # ConversationPublic has no members/messages
         .order_by(Conversation.created_at.desc())
     )
     result = await session.execute(stmt)
     convs = result.scalars().all()
-    return convs
+    return Response(dump_conversations_json(convs), media_type="application/json")
 
 
 @router.post("/{conversation_id}/messages", response_model=MessagePublic, status_code=status.HTTP_201_CREATED)
@@ -72,14 +67,28 @@ async def send_message(
     session: AsyncSession = Depends(get_session),
     current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
 ):
-    # Ensure conversation exists and user is a member
-    stmt = select(ConversationUserLink).where(ConversationUserLink.conversation_id == conversation_id, ConversationUserLink.user_id == current_user.id)
-    res = await session.execute(stmt)
-    if not res.scalars().first():
+    # Membership check and insert in one statement: the INSERT ... SELECT only produces a
+    # row when the sender is a member of the conversation
+    msg = Message(conversation_id=conversation_id, sender_id=current_user.id, content=message_in.content, attachments=message_in.attachments or {})
+    is_member = exists().where(
+        ConversationUserLink.conversation_id == conversation_id,
+        ConversationUserLink.user_id == current_user.id,
+    )
+    columns = ["id", "conversation_id", "sender_id", "content", "attachments", "is_read", "created_at"]
+    statement = (
+        insert(Message)
+        .from_select(
+            columns,
+            select(*[literal(getattr(msg, c), Message.__table__.c[c].type) for c in columns]).where(is_member),
+        )
+        .returning(Message)
+        .options(lazyload("*"))
+    )
+    new_msg = (await session.execute(statement)).scalars().first()
+    if new_msg is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not a member of this conversation")
 
-    msg = Message(conversation_id=conversation_id, sender_id=current_user.id, content=message_in.content, attachments=message_in.attachments or {})
-    new_msg = await message_repo.create(session, obj_in=msg)
+    await session.commit()
     return new_msg
 
 
@@ -90,7 +99,12 @@ async def get_messages(
     current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
 ):
+    """
+    Newest messages first. The client prepends each page above the ones it already has
+    and passes X-Next-Cursor back as `cursor` to load older history.
+    """
     # Ensure membership
     stmt_check = select(ConversationUserLink).where(ConversationUserLink.conversation_id == conversation_id, ConversationUserLink.user_id == current_user.id)
     res_check = await session.execute(stmt_check)
@@ -100,11 +114,19 @@ async def get_messages(
     stmt = (
         select(Message)
         .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.desc())
-        .options(selectinload(Message.sender))
-        .offset(offset)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .options(lazyload("*"))  # MessagePublic only has scalar fields
         .limit(limit)
     )
+    # Older history is paged with the X-Next-Cursor value; offset stays for old clients
+    after = decode_cursor(cursor)
+    if after is not None:
+        stmt = stmt.where(tuple_(Message.created_at, Message.id) < tuple_(*after))
+    else:
+        stmt = stmt.offset(offset)
     result = await session.execute(stmt)
     messages = result.scalars().all()
-    return list(reversed(messages))  # return chronological order
+    return Response(
+        dump_messages_json(messages), media_type="application/json",
+        headers=cursor_headers(next_cursor(messages, limit)),
+    )
@@ -1,17 +1,18 @@
 # app/api/routers/notifications.py
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 import uuid
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy import tuple_
+from sqlalchemy.orm import lazyload
 
 from app.db.session import get_session
 from app.core.auth import get_current_user_dependency
 from app.db.models import  Notification
 from app.schemas.auth import TokenUser
-from app.schemas.notifications import NotificationPublic
-from app.api.deps import pagination_params
+from app.schemas.notifications import NotificationPublic, NotificationsMarkRead, dump_notifications_json
+from app.api.deps import cursor_headers, next_cursor, pagination_params
 from app.core.config import settings
 
 router = APIRouter()
@@ -28,29 +29,49 @@ async def get_my_notifications(
     statement = (
         select(Notification)
         .where(Notification.user_id == current_user.id)
-        .options(selectinload(Notification.user))
-        .order_by(Notification.created_at.desc())
-        .offset(pagination.skip)
+        .options(lazyload("*"))  # NotificationPublic only has scalar fields
+        .order_by(Notification.created_at.desc(), Notification.id.desc())
         .limit(pagination.limit)
     )
+    after = pagination.after
+    if after is not None:
+        statement = statement.where(tuple_(Notification.created_at, Notification.id) < tuple_(*after))
+    else:
+        statement = statement.offset(pagination.skip)
     result = await session.execute(statement)
     notifications = result.scalars().all()
-    return notifications
+    return Response(
+        dump_notifications_json(notifications), media_type="application/json",
+        headers=cursor_headers(next_cursor(notifications, pagination.limit)),
+    )
 
-@router.post("/{notification_id}/read", status_code=status.HTTP_204_NO_CONTENT)
-async def mark_notification_as_read(
-    notification_id: str,
+@router.post("/read", status_code=status.HTTP_204_NO_CONTENT)
+async def mark_notifications_read(
+    payload: NotificationsMarkRead,
     session: AsyncSession = Depends(get_session),
     current_user: TokenUser = Depends(get_current_user_dependency(settings)),
 ):
     """
-    Mark a single notification as read.
+    Mark several notifications as read in one UPDATE (e.g. when the tray is opened).
+    Ids that don't belong to the current user are ignored.
     """
     statement = (
         update(Notification)
-        .where(Notification.id == notification_id, Notification.user_id == current_user.id)
+        .where(Notification.id.in_(payload.ids), Notification.user_id == current_user.id)
         .values(is_read=True)
+        .execution_options(synchronize_session=False)
     )
     await session.execute(statement)
     await session.commit()
     return
+
+@router.post("/{notification_id}/read", status_code=status.HTTP_204_NO_CONTENT)
+async def mark_notification_as_read(
+    notification_id: str,
+    session: AsyncSession = Depends(get_session),
+    current_user: TokenUser = Depends(get_current_user_dependency(settings)),
+):
+    """
+    Mark a single notification as read.
+    """
+    return await mark_notifications_read(NotificationsMarkRead(ids=[notification_id]), session, current_user)
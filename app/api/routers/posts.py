@@ -1,27 +1,66 @@
 # app/api/routers/posts.py
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, BackgroundTasks
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import tuple_
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
 from typing import List, Optional
-import cloudinary
-import cloudinary.uploader
 
 from app.core.config import settings
-from app.core.auth import get_current_user_dependency
+from app.core.auth import get_current_user_dependency, user_from_token
+from app.core.cache import (
+    FEED_CACHE_TTL,
+    POST_FEEDS_NAMESPACE,
+    cached_page,
+    get_like_delta,
+    get_like_deltas,
+    institution_namespace,
+    invalidate_post_feeds,
+    versioned_key,
+)
 from app.db.session import get_session
 from app.db.models import Media, MediaType, PostPrivacy, User, Post, UserRole, PostType
 from app.schemas.auth import TokenUser
-from app.schemas.post import PostCreate, PostPublic, PresignedUrlResponse
-from app.db.repositories.post_repo import post_repo
+from app.schemas.post import CloudinarySignatureResponse, PostCreate, PostCreateWithMedia, PostPublic, PresignedUrlResponse, dump_posts_json
+from app.db.repositories.post_repo import post_list_options, post_repo
 from app.services.media_service import media_service
-from app.api.deps import pagination_params
-from app.tasks.media_tasks import process_video_thumbnail
+from app.api.deps import cursor_headers, next_cursor, pagination_params, validate_media_uploads
+from app.tasks.media_tasks import discard_staged_uploads, enqueue_video_thumbnail, schedule_media_uploads, stage_media_uploads
 
 router = APIRouter()
 
 
-@router.post("/", response_model=PostPublic, status_code=status.HTTP_201_CREATED)
+# Cloudinary folder and resource type for each kind of post media
+MEDIA_UPLOAD_TARGETS = {
+    MediaType.IMAGE: ("posts/images", "image"),
+    MediaType.VIDEO: ("posts/videos", "video"),
+}
+
+
+async def _resolve_school_scope(session: AsyncSession, user_id: str) -> str:
+    """Institution id a school-scoped post belongs to, taken from the author's profile."""
+    user = await session.get(
+        User,
+        user_id,
+        options=[
+            selectinload(User.student_profile),
+            selectinload(User.institution_profile),
+        ],
+    )
+
+    # Check profiles for the ID
+    institution_id = None
+    if user.institution_profile:
+        institution_id = user.institution_profile.institution_id
+    elif user.student_profile:
+        institution_id = user.student_profile.institution_id
+
+    if not institution_id:
+        raise HTTPException(400, "User is not linked to a valid institution")
+    return institution_id
+
+
+@router.post("/", response_model=PostPublic, status_code=status.HTTP_201_CREATED, deprecated=True)
 async def create_post(
     *,
     session: AsyncSession = Depends(get_session),
@@ -39,51 +78,21 @@ async def create_post(
     video: Optional[UploadFile] = File(None),
 ):
     """
-    Create a new post (regular or reel).
+    Create a new post (regular or reel), uploading its media through the API.
 
-    For posts with media:
-    - Get a presigned URL from `/media/presigned-url`.
-    - Upload the file to S3.
-    - Include the media URL in the `content` or media list.
+    Deprecated: proxies every file through this process. Upload straight to Cloudinary
+    with a signature from `/media/cloudinary-signature`, then call `POST /with-media`.
     """
 
     # -----------------------------
-    # VALIDATION
+    # VALIDATION (before any database or Cloudinary work)
     # -----------------------------
-    if images and video:
-        raise HTTPException(400, "Cannot upload images and video together")
+    validate_media_uploads(images, video, post_type, content)
 
-    if post_type == PostType.REEL and not video:
-        raise HTTPException(400, "Reel post requires a video")
-
-    if post_type == PostType.POST and not (content or images):
-        raise HTTPException(400, "Post must have text or image")
-
-    # -----------------------------
-    # SCHOOL SCOPE AUTO-SET
-    # -----------------------------
     # -----------------------------
     # GET INSTITUTION ID
     # -----------------------------
-    final_institution_id = None
-    if is_school_scope:
-        user = await session.get(
-            User,
-            current_user.id,
-            options=[
-                selectinload(User.student_profile),
-                selectinload(User.institution_profile),
-            ],
-        )
-        
-        # Check profiles for the ID
-        if user.institution_profile:
-            final_institution_id = user.institution_profile.institution_id
-        elif user.student_profile:
-            final_institution_id = user.student_profile.institution_id
-            
-        if not final_institution_id:
-             raise HTTPException(400, "User is not linked to a valid institution")
+    final_institution_id = await _resolve_school_scope(session, current_user.id) if is_school_scope else None
 
     post = Post(
         author_id=current_user.id,
@@ -93,93 +102,37 @@ async def create_post(
         school_scope=final_institution_id,
     )
 
-    session.add(post)
-    await session.flush()
-
     # -----------------------------
     # HANDLE MEDIA UPLOADS
     # -----------------------------
-    media_objects: list[Media] = []
-
-    if images:
-        for img in images:
-            if img.content_type not in ["image/jpeg", "image/png"]:
-                raise HTTPException(400, "Only JPG and PNG images allowed")
-
-            upload = cloudinary.uploader.upload(
-                img.file,
-                folder="posts/images",
-                resource_type="image",
-            )
-
-            media_objects.append(
-                Media(
-                    post_id=post.id,
-                    media_type=MediaType.IMAGE,
-                    url=upload["secure_url"],
-                    file_metadata={
-                        "width": upload.get("width"),
-                        "height": upload.get("height"),
-                        "format": upload.get("format"),
-                        "bytes": upload.get("bytes"),
-                    },
-                )
-            )
-
-    if video:
-        if video.content_type not in ["video/mp4", "video/quicktime"]:
-            raise HTTPException(400, "Only MP4 or MOV videos allowed")
-
-        upload = cloudinary.uploader.upload(
-            video.file,
-            folder="posts/videos",
-            resource_type="video",
-        )
-
-        media_objects.append(
-            Media(
-                post_id=post.id,
-                media_type=MediaType.VIDEO,
-                url=upload["secure_url"],
-                file_metadata={
-                    "duration": upload.get("duration"),
-                    "format": upload.get("format"),
-                    "bytes": upload.get("bytes"),
-                },
-            )
-        )
-
-    session.add_all(media_objects)
+    # Files are spooled to disk and go to Cloudinary after the response; the Media
+    # rows are PENDING until the upload task fills in their url
+    staged = await stage_media_uploads(post.id, images=images, video=video)
 
     # -----------------------------
     # COMMIT ONCE (ATOMIC)
     # -----------------------------
-    await session.commit()
-    await session.refresh(post)
-
-    # -----------------------------
-    # BACKGROUND VIDEO PROCESSING
-    # -----------------------------
-    if post_type == PostType.REEL and media_objects:
-        background_tasks.add_task(
-            process_video_thumbnail,
-            post_id=post.id,
-            video_url=media_objects[0].url,
-        )
+    # The returned post already carries its author and media, so it is the response as-is
+    try:
+        post = await post_repo.insert_with_author(session, post, [media for media, _ in staged], user_from_token(current_user))
+        await session.commit()
+    except BaseException:
+        # Nothing will upload the spooled files now
+        discard_staged_uploads(staged)
+        raise
+    await invalidate_post_feeds(post.school_scope)
 
     # -----------------------------
-    # RESPONSE
+    # BACKGROUND UPLOADS + VIDEO PROCESSING
     # -----------------------------
-    result = await session.execute(
-        select(Post)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.media),
-        )
-        .where(Post.id == post.id)
+    schedule_media_uploads(
+        background_tasks,
+        staged,
+        thumbnail_post_id=post.id if post_type == PostType.REEL else None,
+        school_scope=post.school_scope,
     )
 
-    return result.scalar_one()
+    return post
 
 
 
@@ -205,6 +158,80 @@ async def get_presigned_upload_url(
     return {"upload_url": url_data["upload_url"], "file_key": url_data["file_key"]}
 
 
+@router.get("/media/cloudinary-signature", response_model=CloudinarySignatureResponse)
+async def get_cloudinary_upload_signature(
+    *,
+    media_type: MediaType,
+    current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
+):
+    """
+    Sign a direct client-to-Cloudinary upload. POST the file to `upload_url` with the
+    returned fields, then send the resulting `secure_url` to `POST /with-media`.
+    """
+    folder, resource_type = MEDIA_UPLOAD_TARGETS[media_type]
+    return media_service.generate_cloudinary_signature(folder, resource_type)
+
+
+@router.post("/with-media", response_model=PostPublic, status_code=status.HTTP_201_CREATED)
+async def create_post_with_urls(
+    *,
+    session: AsyncSession = Depends(get_session),
+    post_in: PostCreateWithMedia,
+    current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
+):
+    """
+    Create a post whose media the client already uploaded to Cloudinary; only the
+    resulting URLs and metadata are sent here.
+    """
+    post_type = post_in.post_type or PostType.POST
+    images = [m for m in post_in.media if m.media_type == MediaType.IMAGE]
+    videos = [m for m in post_in.media if m.media_type == MediaType.VIDEO]
+
+    if images and videos:
+        raise HTTPException(400, "Cannot upload images and video together")
+    if len(videos) > 1:
+        raise HTTPException(400, "Only one video per post")
+    if post_type == PostType.REEL and not videos:
+        raise HTTPException(400, "Reel post requires a video")
+    if post_type == PostType.POST and not (post_in.content or images):
+        raise HTTPException(400, "Post must have text or image")
+
+    # Only accept assets that went through our signed upload, not arbitrary links
+    for m in post_in.media:
+        folder, resource_type = MEDIA_UPLOAD_TARGETS[m.media_type]
+        if not media_service.is_own_cloudinary_url(m.secure_url, folder, resource_type):
+            raise HTTPException(400, "Media URL was not uploaded through this service")
+
+    final_institution_id = (
+        await _resolve_school_scope(session, current_user.id) if post_in.is_school_scope else None
+    )
+
+    post = Post(
+        author_id=current_user.id,
+        content=post_in.content,
+        post_type=post_type,
+        privacy=post_in.privacy,
+        school_scope=final_institution_id,
+    )
+    media = [
+        Media(
+            post_id=post.id,
+            media_type=m.media_type,
+            url=m.secure_url,
+            file_metadata=m.model_dump(exclude={"media_type", "secure_url"}, exclude_none=True),
+        )
+        for m in post_in.media
+    ]
+    post = await post_repo.insert_with_author(session, post, media, user_from_token(current_user))
+    await session.commit()
+    await invalidate_post_feeds(post.school_scope)
+
+    if post_type == PostType.REEL:
+        await enqueue_video_thumbnail(post.id)
+
+    return post
+
+
 @router.get("/", response_model=List[PostPublic])
 async def read_posts(
     *,
@@ -216,18 +243,30 @@ async def read_posts(
     Retrieve posts for the main feed (type = POST).
     Can filter by school scope.
     """
-    stmt = (
-        select(Post)
-        .where(Post.post_type == PostType.POST)
-        .options(selectinload(Post.author))
-        .order_by(Post.created_at.desc())
+    async def load() -> tuple[bytes, Optional[str]]:
+        stmt = (
+            select(Post)
+            .where(Post.post_type == PostType.POST)
+            .options(*post_list_options())
+            .order_by(Post.created_at.desc(), Post.id.desc())
+        )
+        if school_scope:
+            stmt = stmt.where(Post.school_scope == school_scope)
+
+        after = pagination.after
+        if after is not None:
+            stmt = stmt.where(tuple_(Post.created_at, Post.id) < tuple_(*after))
+        else:
+            stmt = stmt.offset(pagination.skip)
+        posts = (await session.execute(stmt.limit(pagination.limit))).scalars().all()
+        like_deltas = await get_like_deltas([post.id for post in posts])
+        return dump_posts_json(posts, like_deltas), next_cursor(posts, pagination.limit)
+
+    key = await versioned_key(
+        POST_FEEDS_NAMESPACE, "feed", school_scope, pagination.cursor or pagination.skip, pagination.limit
     )
-    if school_scope:
-        stmt = stmt.where(Post.school_scope == school_scope)
-
-    stmt = stmt.offset(pagination.skip).limit(pagination.limit)
-    posts = (await session.execute(stmt)).scalars().all()
-    return posts
+    body, cursor = await cached_page(key, FEED_CACHE_TTL, load)
+    return Response(body, media_type="application/json", headers=cursor_headers(cursor))
 
 
 @router.get("/reels", response_model=List[PostPublic])
@@ -239,7 +278,9 @@ async def read_reels(
     """
     Retrieve all posts of type 'reel'.
     """
-    return await post_repo.get_reels(session, skip=pagination.skip, limit=pagination.limit)
+    reels = await post_repo.get_reels(session, skip=pagination.skip, limit=pagination.limit)
+    like_deltas = await get_like_deltas([reel.id for reel in reels])
+    return Response(dump_posts_json(reels, like_deltas), media_type="application/json")
 
 
 @router.get("/{post_id}", response_model=PostPublic)
@@ -254,7 +295,10 @@ async def read_post(
     post = await post_repo.get_by_id_with_author(session, id=post_id)
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-    return post
+    # Add the likes the worker hasn't flushed to the row yet
+    public = PostPublic.model_validate(post)
+    public.like_count += await get_like_delta(post_id)
+    return public
 
 
 
@@ -271,23 +315,25 @@ async def get_posts_by_institution(
     """
     Fetch all posts belonging to a specific institution by ID.
     """
-    stmt = (
-        select(Post)
-        .where(Post.school_scope == institution_id)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.media)
+    async def load() -> tuple[bytes, Optional[str]]:
+        posts = await post_repo.get_school_scope_feed(
+            session,
+            school_scope=institution_id,
+            post_type=post_type,
+            skip=pagination.skip,
+            limit=pagination.limit,
+            after=pagination.after,
         )
-        .order_by(Post.created_at.desc())
-    )
-    
-    if post_type:
-        stmt = stmt.where(Post.post_type == post_type)
+        like_deltas = await get_like_deltas([post.id for post in posts])
+        return dump_posts_json(posts, like_deltas), next_cursor(posts, pagination.limit)
 
-    stmt = stmt.offset(pagination.skip).limit(pagination.limit)
-    
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    # Same key as GET /institutions/{id}/post: both list the same page
+    key = await versioned_key(
+        institution_namespace(institution_id), "posts", post_type and post_type.value,
+        pagination.cursor or pagination.skip, pagination.limit,
+    )
+    body, cursor = await cached_page(key, FEED_CACHE_TTL, load)
+    return Response(body, media_type="application/json", headers=cursor_headers(cursor))
 
 
 
@@ -314,3 +360,4 @@ async def delete_post(
 
     await session.delete(post)
     await session.commit()
+    await invalidate_post_feeds(post.school_scope)
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload
 from sqlmodel import select
 from typing import List
 
+from app.api.deps import cursor_headers, next_cursor, pagination_params
 from app.db.session import get_session
 from app.core.auth import get_current_user_dependency
 from app.core.config import settings
 from app.db.models import StudentResource, Institution
-from app.schemas.student_portal import StudentResourceCreate, StudentResourcePublic
+from app.schemas.student_portal import StudentResourceCreate, StudentResourcePublic, dump_student_resources_json
 from app.schemas.auth import TokenUser
 from app.db.repositories.base import BaseRepository
 from app.db.repositories.institution_repo import institution_repo
@@ -48,11 +51,27 @@ async def create_resource(
 async def list_resources_for_institution(
     institution_id: str,
     session: AsyncSession = Depends(get_session),
+    pagination: pagination_params = Depends(),
 ):
-    stmt = select(StudentResource).where(StudentResource.institution_id == institution_id).order_by(StudentResource.created_at.desc())
+    stmt = (
+        select(StudentResource)
+        .where(StudentResource.institution_id == institution_id)
+        .options(lazyload("*"))  # StudentResourcePublic has no institution
+        .order_by(StudentResource.created_at.desc(), StudentResource.id.desc())
+        .limit(pagination.limit)
+    )
+    # Keyset pages (X-Next-Cursor) are a range scan on ix_studentresource_institution_created_at_id
+    after = pagination.after
+    if after is not None:
+        stmt = stmt.where(tuple_(StudentResource.created_at, StudentResource.id) < tuple_(*after))
+    else:
+        stmt = stmt.offset(pagination.skip)
     result = await session.execute(stmt)
     resources = result.scalars().all()
-    return resources
+    return Response(
+        dump_student_resources_json(resources), media_type="application/json",
+        headers=cursor_headers(next_cursor(resources, pagination.limit)),
+    )
 
 
 
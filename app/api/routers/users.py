@@ -1,16 +1,22 @@
 # app/api/routers/users.py
-from fastapi import APIRouter, Depends, HTTPException
-from app.core.cloudinary import cloudinary
-import cloudinary.api
+import asyncio
+import logging
+
+import httpx
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cached_json
 from app.core.config import settings
 from app.db.session import get_session
 from app.core.auth import get_current_user_dependency
 from app.schemas.auth import TokenUser, UserPublic
 from app.db.repositories.user_repo import user_repo
+from app.services.media_service import media_service
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.get("/me", response_model=UserPublic)
 async def read_users_me(current_user: TokenUser = Depends(get_current_user_dependency(settings=settings))):
@@ -41,6 +47,61 @@ CLOUDINARY_CATEGORIES = [
     "campus_post", "lasu_post", "oau_post", "reels", "unilag_post", "yabatech_post", "chatbot"
 ]
 
+
+# Folder listings barely change, and each miss is two Admin API calls (which Cloudinary
+# rate-limits per hour), so they are served from Redis for a few minutes
+MEDIA_FILES_CACHE_TTL = 300
+
+
+async def _list_category_urls(category: str) -> list[str]:
+    # Images and videos are separate Admin API listings; fetch both at once
+    images, videos = await asyncio.gather(
+        media_service.list_cloudinary_urls(prefix=category, resource_type="image"),
+        media_service.list_cloudinary_urls(prefix=category, resource_type="video"),
+    )
+    return images + videos
+
+
+async def _category_urls_json(category: str):
+    async def load() -> bytes:
+        try:
+            urls = await _list_category_urls(category)
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=500, detail=f"Cloudinary error: {str(e)}")
+        return orjson.dumps(urls)
+
+    return await cached_json(f"cloudinary:list:{category}", MEDIA_FILES_CACHE_TTL, load)
+
+
+async def warm_media_files_cache() -> None:
+    """Fill the listing cache for every category; started in the background at app startup."""
+    results = await asyncio.gather(
+        *(_category_urls_json(category) for category in CLOUDINARY_CATEGORIES), return_exceptions=True
+    )
+    for category, result in zip(CLOUDINARY_CATEGORIES, results):
+        if isinstance(result, Exception):
+            logger.warning("Could not warm media files for %s: %s", category, result)
+
+
+# ----------------------------
+# Get all files for every category
+# ----------------------------
+
+@router.get("/media-files/all", response_model=dict[str, list[str]])
+async def get_all_media_files():
+    """
+    Return the media file URLs of every category, keyed by category. The categories are
+    fetched (or read from cache) concurrently.
+    """
+    bodies = await asyncio.gather(*(_category_urls_json(category) for category in CLOUDINARY_CATEGORIES))
+    # Each cached body is already a JSON array, so splice them into one object as-is
+    body = b"{" + b",".join(
+        orjson.dumps(category) + b":" + (urls.encode() if isinstance(urls, str) else urls)
+        for category, urls in zip(CLOUDINARY_CATEGORIES, bodies)
+    ) + b"}"
+    return Response(body, media_type="application/json")
+
+
 # ----------------------------
 # Get all files for a category
 # ----------------------------
@@ -60,27 +121,5 @@ async def get_media_files_by_category(category: str):
 
         raise HTTPException(status_code=400, detail=f"Invalid category '{category}'")
 
-    try:
-        image_resources = cloudinary.api.resources(
-            type="upload",
-            resource_type="image",
-            prefix=category,
-            max_results=500
-        )
-
-        video_resources = cloudinary.api.resources(
-            type="upload",
-            resource_type="video",
-            prefix=category,
-            max_results=500
-        )
-
-        urls = (
-            [r["secure_url"] for r in image_resources.get("resources", [])] +
-            [r["secure_url"] for r in video_resources.get("resources", [])]
-        )
-
-    except cloudinary.exceptions.Error as e:
-        raise HTTPException(status_code=500, detail=f"Cloudinary error: {str(e)}")
-
-    return urls
+    return Response(await _category_urls_json(category), media_type="application/json")
+
@@ -1,24 +1,64 @@
 # app/core/auth.py
+import asyncio
+import hashlib
+import hmac
+import json
 import logging
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import jwt, logging
-from passlib.context import CryptContext
+import orjson
+from cachetools import TTLCache
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_decode, base64url_encode
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from fastapi import Request, Depends, Response, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload
 from typing import Optional
 from datetime import datetime
 
 
 from app.schemas.auth import TokenUser, LoginResponseModel, UserCreateRead
 from app.core.config import settings, BaseSettings
-from app.db.models import User, UserRole
+from app.db.models import Institution, User, UserRole
+from app.db.repositories.institution_repo import institution_repo
+from app.db.session import get_session
 from app.errors import UnAuthenticated, UserNotFound, InvalidToken
 
 
-passwd_context = CryptContext(schemes=["bcrypt"])
+# New hashes are Argon2id, straight through argon2-cffi (which releases the GIL while
+# hashing); existing bcrypt hashes from the passlib days still verify via bcrypt.checkpw.
+# Both produce the standard $argon2id$ / $2b$ strings, so stored hashes are unchanged.
+_argon2_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 logger = logging.getLogger(__name__)
 
+# Decoded tokens are cached briefly so hot clients skip the HMAC verify on every request.
+# Keys are a truncated sha256 of the raw token; entries also carry the token's own `exp`.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_revoked_tokens: TTLCache = TTLCache(maxsize=10_000, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+# Password checks that succeeded in the last 30s, keyed by an HMAC of (stored hash, password)
+# so repeat logins skip the KDF; a password change alters the stored hash and misses the cache.
+_verified_passwords: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_inflight_verifications: dict[bytes, asyncio.Future] = {}
+# Signed access tokens are reused for 60s per identical claim set, so bursts of logins and
+# profile/onboarding updates skip the JSON encode + HMAC while keeping nearly the full lifetime
+_issued_tokens: TTLCache = TTLCache(maxsize=50_000, ttl=60)
+# Verified Google ID token claims, same keying as _token_cache; failures are never cached
+_google_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+
+# Argon2/bcrypt run on their own CPU-sized pool so a burst of logins can't starve the
+# default executor used by to_thread elsewhere (uploads, the mail client, ...)
+_password_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="passwd")
+
 
 class OptionalOAuth2Scheme(OAuth2PasswordBearer):
     async def __call__(self, request: Request) -> Optional[str]:
@@ -32,16 +72,58 @@ optional_oauth2_scheme = OptionalOAuth2Scheme(tokenUrl="token")
 
 
 def generate_passwd_hash(password: str) -> str:
-    hash = passwd_context.hash(password)
+    hash = _argon2_hasher.hash(password)
 
     return hash
 
 
 def verify_password(password: str, hash: str) -> bool:
-    return passwd_context.verify(password, hash)
+    if hash.startswith("$argon2"):
+        try:
+            return _argon2_hasher.verify(hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    try:
+        return bcrypt.checkpw(password.encode(), hash.encode())
+    except ValueError:  # not a bcrypt hash either
+        return False
+
+async def generate_passwd_hash_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_password_pool, generate_passwd_hash, password)
+
+async def verify_password_cached(password: str, hash: str) -> bool:
+    key = hmac.new(settings.SECRET_KEY.encode(), f"{hash}:{password}".encode(), hashlib.sha256).digest()
+    if key in _verified_passwords:
+        return True
+
+    # Identical checks already running (double-clicks, client retries) share one KDF call
+    pending = _inflight_verifications.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    pending = asyncio.get_running_loop().run_in_executor(_password_pool, verify_password, password, hash)
+    _inflight_verifications[key] = pending
+    try:
+        # shield: one caller disconnecting must not cancel the check for the others
+        verified = await asyncio.shield(pending)
+    finally:
+        _inflight_verifications.pop(key, None)
+
+    if verified:
+        _verified_passwords[key] = True
+    return verified
 
 def get_password_hash(password: str):
-    return passwd_context.hash(password)
+    return generate_passwd_hash(password)
+
+
+def generate_verification_token() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def hash_verification_token(token: str) -> str:
+    """Verification/reset tokens are stored as a sha256 digest, never in plaintext."""
+    return hashlib.sha256(token.encode()).hexdigest()
 
 
 def decode_token(token: str, settings: BaseSettings) -> dict:
@@ -49,9 +131,7 @@ def decode_token(token: str, settings: BaseSettings) -> dict:
         if isinstance(token, str):
             token = token.encode("utf-8")
 
-        token_data = jwt.decode(
-            jwt=token, key=settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        token_data = _decode_jwt(token, settings)
 
         return token_data
 
@@ -60,20 +140,161 @@ def decode_token(token: str, settings: BaseSettings) -> dict:
         return None
 
 
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+
+def _get_cached_token_user(token: str) -> Optional[TokenUser]:
+    cached = _token_cache.get(_token_key(token))
+    if cached is None:
+        return None
+    token_user, exp = cached
+    if exp is not None and exp <= time.time():
+        return None
+    return token_user
+
+
+def _cache_token_user(token: str, token_user: TokenUser, exp: Optional[float]) -> None:
+    _token_cache[_token_key(token)] = (token_user, exp)
+
+
+def _get_request_token_user(request: Request, token: str) -> Optional[TokenUser]:
+    # Every get_current_user_dependency(...) call builds a distinct dependency, so FastAPI
+    # can resolve several per request; the first one's result is reused from request.state
+    cached = getattr(request.state, "token_user", None)
+    if cached is not None and cached.campustalk_access_token == token:
+        return cached
+    return None
+
+
+def is_token_revoked(token: str) -> bool:
+    return _token_key(token) in _revoked_tokens
+
+
+def revoke_token(token: str) -> None:
+    """Drop a token from the decode cache and reject it for the rest of its lifetime."""
+    key = _token_key(token)
+    _token_cache.pop(key, None)
+    _revoked_tokens[key] = True
+
+
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 300
 
+# Prepare the signing key once (bytes for HMAC, a parsed key object for RSA/EC)
+# instead of letting jwt.encode re-prepare it on every login
+_SIGNING_KEY = get_default_algorithms()[settings.ALGORITHM].prepare_key(settings.SECRET_KEY)
+
+# alg/typ never change at runtime, so the encoded header segment is built once. HMAC
+# algorithms are signed directly; anything else falls back to jwt.encode.
+_JWT_HEADER_SEGMENT = base64url_encode(
+    json.dumps({"alg": settings.ALGORITHM, "typ": "JWT"}, separators=(",", ":")).encode()
+)
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _encode_jwt(claims: dict) -> str:
+    digest = _HMAC_DIGESTS.get(settings.ALGORITHM)
+    if digest is None:
+        return jwt.encode(claims, _SIGNING_KEY, algorithm=settings.ALGORITHM)
+
+    payload_segment = base64url_encode(json.dumps(claims, separators=(",", ":")).encode())
+    signing_input = _JWT_HEADER_SEGMENT + b"." + payload_segment
+    signature = hmac.new(_SIGNING_KEY, signing_input, digest).digest()
+    return (signing_input + b"." + base64url_encode(signature)).decode()
+
+
+def _decode_jwt(token: bytes, settings: BaseSettings) -> dict:
+    """
+    Inverse of _encode_jwt: tokens carrying exactly our header are checked with a direct
+    HMAC compare and their claims parsed with orjson. Anything else (other algorithms,
+    foreign headers) goes through jwt.decode as before.
+    """
+    digest = _HMAC_DIGESTS.get(settings.ALGORITHM)
+    if digest is None or not token.startswith(_JWT_HEADER_SEGMENT + b"."):
+        return jwt.decode(jwt=token, key=settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    try:
+        signing_input, signature_segment = token.rsplit(b".", 1)
+        payload_segment = signing_input[len(_JWT_HEADER_SEGMENT) + 1:]
+        signature = base64url_decode(signature_segment)
+        payload = orjson.loads(base64url_decode(payload_segment))
+    except ValueError as e:
+        raise jwt.DecodeError("Invalid token") from e
+
+    expected = hmac.new(settings.SECRET_KEY.encode(), signing_input, digest).digest()
+    if not hmac.compare_digest(expected, signature):
+        raise jwt.InvalidSignatureError("Signature verification failed")
+    if not isinstance(payload, dict):
+        raise jwt.DecodeError("Invalid payload")
+    exp = payload.get("exp")
+    if exp is not None:
+        if not isinstance(exp, (int, float)):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be a number")
+        if exp <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
+    return payload
+
+
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ["https://accounts.google.com", "accounts.google.com"]
+# Module-global so Google's JWKS and the parsed RSA key per `kid` are fetched/imported once
+# and reused until the keys rotate, instead of on every sign-in
+_google_jwks_client = jwt.PyJWKClient(GOOGLE_JWKS_URL, cache_keys=True, lifespan=3600)
+
+
+async def decode_google_id_token(google_token: str) -> dict:
+    key = _token_key(google_token)
+    cached = _google_token_cache.get(key)
+    if cached is not None and (cached.get("exp") is None or cached["exp"] > time.time()):
+        return cached
+
+    claims = await _decode_google_id_token(google_token)
+    _google_token_cache[key] = claims
+    return claims
+
+
+async def _decode_google_id_token(google_token: str) -> dict:
+    if not settings.GOOGLE_CLIENT_ID:
+        # Verification disabled: nothing to check, so just parse the claims segment
+        try:
+            return orjson.loads(base64url_decode(google_token.split(".")[1]))
+        except (IndexError, ValueError) as e:
+            raise jwt.DecodeError("Invalid Google ID token") from e
+
+    # Only a cache miss (new kid / expired JWKS) does network I/O; keep it off the loop
+    signing_key = await asyncio.to_thread(_google_jwks_client.get_signing_key_from_jwt, google_token)
+    return jwt.decode(
+        google_token,
+        signing_key.key,
+        algorithms=["RS256"],
+        audience=settings.GOOGLE_CLIENT_ID,
+        issuer=GOOGLE_ISSUERS,
+    )
+
 
 def create_access_token(user, expires_delta: timedelta | None = None):
+    expires_delta = expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Every claim except exp/jti is part of the key, so a role or verification change
+    # mints a fresh token instead of reusing a stale one
+    key = (str(user.id), user.email, user.full_name, user.role, user.is_verified, expires_delta)
+    cached = _issued_tokens.get(key)
+    if cached is not None and not is_token_revoked(cached):
+        return cached
+
     to_encode = {
         "sub": user.email,
         "id": str(user.id),
         "is_verified": user.is_verified,
         "full_name": user.full_name,
         "role": user.role,
-        "exp": datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+        "exp": int((datetime.now(timezone.utc) + expires_delta).timestamp()),
+        # unique per minted token, so a re-login right after logout never gets the revoked one back
+        "jti": secrets.token_urlsafe(8),
     }
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    token = _encode_jwt(to_encode)
+    _issued_tokens[key] = token
+    return token
 
 
 
@@ -93,6 +314,18 @@ def get_current_user_dependency(settings: BaseSettings):
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        cached = _get_request_token_user(request, campustalk_access_token)
+        if cached is not None:
+            return cached
+
+        if is_token_revoked(campustalk_access_token):
+            raise InvalidToken()
+
+        cached = _get_cached_token_user(campustalk_access_token)
+        if cached is not None:
+            request.state.token_user = cached
+            return cached
+
         try:
             payload = decode_token(campustalk_access_token, settings)
             email = payload.get("sub")
@@ -103,7 +336,7 @@ def get_current_user_dependency(settings: BaseSettings):
             if not email or not user_id:
                 raise UserNotFound()
 
-            return TokenUser(
+            token_user = TokenUser(
                 full_name=full_name,
                 email=email,
                 id=user_id,
@@ -112,6 +345,9 @@ def get_current_user_dependency(settings: BaseSettings):
                 campustalk_access_token=campustalk_access_token,
                 token_type="bearer"
             )
+            _cache_token_user(campustalk_access_token, token_user, payload.get("exp"))
+            request.state.token_user = token_user
+            return token_user
 
         except jwt.ExpiredSignatureError:
             raise InvalidToken()
@@ -123,9 +359,18 @@ def get_current_user_dependency(settings: BaseSettings):
 
 
 
-def verify_email_response(user, campustalk_access_token: str, response: Response):
+def user_from_token(token_user: TokenUser) -> User:
+    """The caller as a (not yet persistent) User with the identity columns the token carries, for embedding as an author."""
+    return User(
+        id=token_user.id,
+        email=token_user.email,
+        full_name=token_user.full_name,
+        role=UserRole(token_user.role),
+    )
+
 
-    print("This is the user", user)
+
+def verify_email_response(user, campustalk_access_token: str, response: Response):
 
     response.set_cookie(
         key="campustalk_access_token",
@@ -139,7 +384,7 @@ def verify_email_response(user, campustalk_access_token: str, response: Response
     return LoginResponseModel(
         status=True,
         message="User successfully logged in",
-        data=UserCreateRead.model_validate(user)
+        data=UserCreateRead.from_user(user)
     )
 
 
@@ -154,6 +399,18 @@ def get_optional_current_user_dependency(settings):
         if not campustalk_access_token:
             return None
 
+        cached = _get_request_token_user(request, campustalk_access_token)
+        if cached is not None:
+            return cached
+
+        if is_token_revoked(campustalk_access_token):
+            return None
+
+        cached = _get_cached_token_user(campustalk_access_token)
+        if cached is not None:
+            request.state.token_user = cached
+            return cached
+
         try:
             payload = decode_token(campustalk_access_token, settings)
             email = payload.get("sub")
@@ -164,7 +421,7 @@ def get_optional_current_user_dependency(settings):
             if not email or not user_id:
                 return None
 
-            return TokenUser(
+            token_user = TokenUser(
                 full_name=full_name,
                 email=email,
                 id=user_id,
@@ -173,6 +430,9 @@ def get_optional_current_user_dependency(settings):
                 campustalk_access_token=campustalk_access_token,
                 token_type="bearer"
             )
+            _cache_token_user(campustalk_access_token, token_user, payload.get("exp"))
+            request.state.token_user = token_user
+            return token_user
         except jwt.ExpiredSignatureError:
             return None
         except jwt.PyJWTError:
@@ -182,6 +442,28 @@ def get_optional_current_user_dependency(settings):
 
 
 
+def get_current_user_orm_dependency(settings: BaseSettings):
+    """Like get_current_user_dependency, but resolves the User row once and keeps it on request.state."""
+    current_user_dependency = get_current_user_dependency(settings=settings)
+
+    async def get_current_user_orm(
+        request: Request,
+        token_user: TokenUser = Depends(current_user_dependency),
+        session: AsyncSession = Depends(get_session),
+    ) -> User:
+        user = getattr(request.state, "user", None)
+        if user is None:
+            # Columns only; callers don't touch the User's selectin collections
+            user = await session.get(User, token_user.id, options=[lazyload("*")])
+            if user is None:
+                raise UserNotFound()
+            request.state.user = user
+        return user
+
+    return get_current_user_orm
+
+
+
 def json_serializer(obj):
     if isinstance(obj, datetime):
         return obj.isoformat()
@@ -206,4 +488,39 @@ def require_role(required_role: UserRole):
 
 require_admin = require_role(UserRole.ADMIN)
 require_student = require_role(UserRole.STUDENT)
-require_institution = require_role(UserRole.INSTITUTION)
\ No newline at end of file
+require_institution = require_role(UserRole.INSTITUTION)
+
+
+async def require_institution_admin(
+    institution_id: str,
+    request: Request,
+    current_user: TokenUser = Depends(get_current_user_dependency(settings=settings)),
+    session: AsyncSession = Depends(get_session),
+) -> Institution:
+    """
+    Path dependency for institution mutations: the institution (404 if missing), provided
+    the caller is a platform admin or an institution account linked to it (403 otherwise).
+    The role check costs nothing; the institution and the admin link come back from one
+    SELECT, remembered on request.state for any later check in the same request.
+    """
+    if current_user.role not in (UserRole.INSTITUTION, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only institution accounts can manage an institution",
+        )
+
+    checked = getattr(request.state, "admin_institutions", None)
+    if checked is None:
+        checked = request.state.admin_institutions = {}
+    inst = checked.get(institution_id)
+    if inst is None:
+        inst, is_admin = await institution_repo.get_with_admin_check(session, institution_id, current_user.id)
+        if not inst:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Institution not found")
+        if not is_admin and current_user.role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not an admin for this institution",
+            )
+        checked[institution_id] = inst
+    return inst
@@ -0,0 +1,188 @@
+# app/core/cache.py
+import logging
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Shared Redis client for the app's short-lived keys (connections are pooled by the client)."""
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+# Redis only ever speeds things up here: on any error the callers fall back to the database
+
+async def cache_get(key: str) -> Optional[str]:
+    try:
+        return await get_redis().get(key)
+    except RedisError as e:
+        logger.warning("Redis GET %s failed: %s", key, e)
+        return None
+
+
+async def cache_set(key: str, value: Union[str, bytes], ttl: int) -> None:
+    try:
+        await get_redis().set(key, value, ex=ttl)
+    except RedisError as e:
+        logger.warning("Redis SET %s failed: %s", key, e)
+
+
+async def cache_delete(key: str) -> None:
+    try:
+        await get_redis().delete(key)
+    except RedisError as e:
+        logger.warning("Redis DEL %s failed: %s", key, e)
+
+
+# Versioned namespaces: a cached key embeds its namespace's current version, so bumping
+# the version (one INCR) invalidates every key under it without SCAN/DEL; the stale
+# keys simply age out on their TTL.
+
+FEED_CACHE_TTL = 60
+POST_FEEDS_NAMESPACE = "posts"
+
+
+def institution_namespace(institution_id: str) -> str:
+    return f"inst:{institution_id}"
+
+
+async def versioned_key(namespace: str, *parts: Any) -> str:
+    try:
+        version = await get_redis().get(f"{namespace}:ver") or "0"
+    except RedisError as e:
+        logger.warning("Redis GET %s:ver failed: %s", namespace, e)
+        version = "0"
+    return ":".join([namespace, f"v{version}", *map(str, parts)])
+
+
+async def bump_namespace(*namespaces: str) -> None:
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for namespace in namespaces:
+                pipe.incr(f"{namespace}:ver")
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Redis INCR %s failed: %s", namespaces, e)
+
+
+async def cached_json(key: str, ttl: int, produce: Callable[[], Awaitable[Union[str, bytes]]]) -> Union[str, bytes]:
+    """Read-through cache for an already-encoded JSON body."""
+    body = await cache_get(key)
+    if body is None:
+        body = await produce()
+        await cache_set(key, body, ttl)
+    return body
+
+
+async def cached_page(
+    key: str,
+    ttl: int,
+    produce: Callable[[], Awaitable[tuple[Union[str, bytes], Optional[str]]]],
+) -> tuple[Union[str, bytes], Optional[str]]:
+    """cached_json for paginated lists: the body and its next-page cursor are read/written together."""
+    try:
+        body, cursor = await get_redis().mget(key, f"{key}:next")
+    except RedisError as e:
+        logger.warning("Redis MGET %s failed: %s", key, e)
+        body = None
+    if body is not None:
+        return body, cursor or None
+
+    body, cursor = await produce()
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.set(key, body, ex=ttl)
+            pipe.set(f"{key}:next", cursor or "", ex=ttl)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Redis SET %s failed: %s", key, e)
+    return body, cursor
+
+
+async def invalidate_post_feeds(institution_id: Optional[str] = None) -> None:
+    """Call after a post (or its media) is created, changed or deleted."""
+    namespaces = [POST_FEEDS_NAMESPACE]
+    if institution_id:
+        namespaces.append(institution_namespace(institution_id))
+    await bump_namespace(*namespaces)
+
+
+# Like counters: a toggle INCRBYs a per-post delta here instead of UPDATE-ing the post
+# row, so likes on a busy post don't queue on one row lock. The post id also goes into a
+# dirty set, and the worker folds the listed deltas into post.like_count every
+# LIKE_FLUSH_INTERVAL seconds.
+
+LIKE_FLUSH_INTERVAL = 10
+LIKE_FLUSH_BATCH = 1000
+LIKE_DIRTY_KEY = "posts:likes:dirty"
+
+
+def like_delta_key(post_id: str) -> str:
+    return f"post:{post_id}:likes"
+
+
+async def add_like_delta(post_id: str, delta: int) -> bool:
+    """False if Redis is unavailable; the caller must then apply the delta in SQL itself."""
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.incrby(like_delta_key(post_id), delta)
+            pipe.sadd(LIKE_DIRTY_KEY, post_id)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Redis INCRBY %s failed: %s", like_delta_key(post_id), e)
+        return False
+    return True
+
+
+async def get_like_delta(post_id: str) -> int:
+    """Likes toggled since the last flush (0 if Redis is unavailable)."""
+    return int(await cache_get(like_delta_key(post_id)) or 0)
+
+
+async def get_like_deltas(post_ids: list[str]) -> dict[str, int]:
+    """Unflushed like deltas for a page of posts in one MGET ({} if Redis is unavailable)."""
+    if not post_ids:
+        return {}
+    try:
+        values = await get_redis().mget([like_delta_key(post_id) for post_id in post_ids])
+    except RedisError as e:
+        logger.warning("Redis MGET of %d like deltas failed: %s", len(post_ids), e)
+        return {}
+    return {post_id: int(value) for post_id, value in zip(post_ids, values) if value}
+
+
+async def pop_like_deltas() -> dict[str, int]:
+    """
+    Take (SPOP, then GETDEL) up to LIKE_FLUSH_BATCH pending deltas. A toggle racing the
+    flush re-adds its post to the dirty set, so its delta is picked up on the next run.
+    """
+    redis = get_redis()
+    post_ids = await redis.spop(LIKE_DIRTY_KEY, LIKE_FLUSH_BATCH)
+    if not post_ids:
+        return {}
+    async with redis.pipeline(transaction=False) as pipe:
+        for post_id in post_ids:
+            pipe.getdel(like_delta_key(post_id))
+        values = await pipe.execute()
+    return {
+        post_id: int(value)
+        for post_id, value in zip(post_ids, values)
+        if value is not None and int(value) != 0
+    }
@@ -12,10 +12,13 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 # 24 hours
+    GOOGLE_CLIENT_ID: Optional[str] = None # enables signature/audience checks on Google ID tokens
     
     # Database
     DATABASE_URL: str = None
     DATABASE_URL_ASYNC: str = None
+    DEBUG_RAISELOAD: bool = False # feed queries raise on any relationship they didn't eager-load (dev only)
+    DB_PGBOUNCER: bool = False # DATABASE_URL_ASYNC points at PgBouncer in transaction mode: no server-side statement caches
 
     FRONTEND_URL: str
 
@@ -2,12 +2,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, Request, HTTPException
 from starlette.responses import Response
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from colorlog import ColoredFormatter
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
 import time, json, logging, traceback
 
+from app.api.deps import NEXT_CURSOR_HEADER
+
 
 # Formatter for console
 console_formatter = ColoredFormatter(
@@ -127,7 +130,8 @@ def register_middleware(app: FastAPI):
         return response
 
 
-    app.add_middleware(CORSMiddleware, allow_origins=allowed_origins, allow_methods=["*"], allow_headers=["*"], allow_credentials=True,)
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+    app.add_middleware(CORSMiddleware, allow_origins=allowed_origins, allow_methods=["*"], allow_headers=["*"], allow_credentials=True, expose_headers=[NEXT_CURSOR_HEADER],)
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=[
         "localhost",
         "127.0.0.1",
@@ -32,6 +32,12 @@ class MediaType(str, enum.Enum):
     VIDEO = "video"
 
 
+class MediaStatus(str, enum.Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
+
 class NotificationType(str, enum.Enum):
     LIKE = "like"
     COMMENT = "comment"
@@ -74,7 +80,7 @@ class User(SQLModel, table=True):
     bio: Optional[str] = None
     profile_picture: Optional[str] = None
     is_active: bool = Field(default=True)
-    verification_token: Optional[str]  = None
+    verification_token: Optional[str] = Field(default=None, max_length=64, index=True)  # sha256 hex digest
     is_onboarding_completed: bool = Field(default=False, nullable=True)
     is_verified: bool = Field(default=False)
     role: UserRole = Field(sa_column=Column(Enum(UserRole)), default=UserRole.GENERAL)
@@ -119,6 +125,11 @@ class User(SQLModel, table=True):
     messages_sent: List["Message"] = Relationship(back_populates="sender", sa_relationship_kwargs={"lazy": "selectin"})
 
 
+# Case-insensitive uniqueness; lookups and the register ON CONFLICT target use lower(...)
+sa.Index("ix_user_email_lower", sa.func.lower(User.email), unique=True)
+sa.Index("ix_user_username_lower", sa.func.lower(User.username), unique=True)
+
+
 
 
 
@@ -127,6 +138,10 @@ class StudentProfile(SQLModel, table=True):
     user_id: str = Field(foreign_key="user.id", unique=True)
     institution_id: Optional[str] = Field(foreign_key="institution.id", default=None)
     institution_name: Optional[str] = None
+    # Snapshot of the Institution row taken when the profile is created. Nothing refreshes
+    # these when the institution changes, so read Institution itself for current values.
+    institution_profile_picture: Optional[str] = None
+    institution_website: Optional[str] = None
     faculty: Optional[str] = None
     department: Optional[str] = None
     matric_number: Optional[str]  = None
@@ -208,11 +223,13 @@ class Post(SQLModel, table=True):
         default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(DateTime(timezone=True))
     )
+    # Lags the likes table by up to LIKE_FLUSH_INTERVAL; toggles accumulate in Redis first
+    like_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     
     community_id: Optional[str] = Field(foreign_key="community.id", default=None)
     channel_id: Optional[str] = Field(foreign_key="channel.id", default=None)
 
-    author: User = Relationship(back_populates="posts", sa_relationship_kwargs={"lazy": "selectin"})
+    author: User = Relationship(back_populates="posts", sa_relationship_kwargs={"lazy": "joined"})
     media: List["Media"] = Relationship(back_populates="post", sa_relationship_kwargs={"lazy": "selectin"})
     comments: List["Comment"] = Relationship(back_populates="post", sa_relationship_kwargs={"lazy": "selectin"})
     likes: List["Like"] = Relationship(back_populates="post", sa_relationship_kwargs={"lazy": "selectin"})
@@ -220,18 +237,46 @@ class Post(SQLModel, table=True):
     channel: Optional[Channel] = Relationship(back_populates="posts", sa_relationship_kwargs={"lazy": "selectin"})
 
 
+# Keyset pagination: feeds page with WHERE (created_at, id) < (...) ORDER BY created_at DESC, id DESC
+sa.Index("ix_post_created_at_id", Post.created_at.desc(), Post.id.desc())
+sa.Index(
+    "ix_post_school_scope_created_at_id", Post.school_scope, Post.created_at.desc(), Post.id.desc(),
+    postgresql_where=Post.school_scope.isnot(None),
+)
+# ... and with the post_type filter (main feed / reels, institution feed by type)
+sa.Index("ix_post_type_created_at_id", Post.post_type, Post.created_at.desc(), Post.id.desc())
+sa.Index(
+    "ix_post_school_scope_type_created_at_id", Post.school_scope, Post.post_type, Post.created_at.desc(), Post.id.desc(),
+    postgresql_where=Post.school_scope.isnot(None),
+)
+# ... and per channel / community feed
+sa.Index(
+    "ix_post_channel_created_at_id", Post.channel_id, Post.created_at.desc(), Post.id.desc(),
+    postgresql_where=Post.channel_id.isnot(None),
+)
+sa.Index(
+    "ix_post_community_created_at_id", Post.community_id, Post.created_at.desc(), Post.id.desc(),
+    postgresql_where=Post.community_id.isnot(None),
+)
+
+
 class Media(SQLModel, table=True):
     id: str = Field(default_factory=generate_uuid, primary_key=True)
     post_id: str = Field(foreign_key="post.id")
     media_type: MediaType = Field(sa_column=Column(Enum(MediaType)))
-    url: str
+    # Set once the background upload finishes; until then the row is PENDING
+    url: Optional[str] = None
+    status: MediaStatus = Field(
+        default=MediaStatus.READY,
+        sa_column=Column(sa.String(16), nullable=False, server_default=MediaStatus.READY.value),
+    )
 
     file_metadata: Dict[str, Any] = Field(
         sa_column=Column("metadata", JSON),
         default={}
     )
 
-    post: "Post" = Relationship(back_populates="media", sa_relationship_kwargs={"lazy": "selectin"})
+    post: "Post" = Relationship(back_populates="media", sa_relationship_kwargs={"lazy": "joined"})
 
 
 class Comment(SQLModel, table=True):
@@ -250,6 +295,10 @@ class Comment(SQLModel, table=True):
     likes: List["Like"] = Relationship(back_populates="comment", sa_relationship_kwargs={"lazy": "selectin"})
 
 
+# A post's comments are listed oldest-first
+sa.Index("ix_comment_post_created_at", Comment.post_id, Comment.created_at)
+
+
 class Like(SQLModel, table=True):
     id: str = Field(default_factory=generate_uuid, primary_key=True)
     user_id: str = Field(foreign_key="user.id")
@@ -266,6 +315,10 @@ class Like(SQLModel, table=True):
     comment: Optional[Comment] = Relationship(back_populates="likes", sa_relationship_kwargs={"lazy": "selectin"})
 
 
+# One like per user per post; also the ON CONFLICT target for the like toggle
+sa.Index("uq_like_user_post", Like.user_id, Like.post_id, unique=True, postgresql_where=Like.post_id.isnot(None))
+
+
 class Complaint(SQLModel, table=True):
     id: str = Field(default_factory=generate_uuid, primary_key=True)
     reporter_id: str = Field(foreign_key="user.id")
@@ -304,6 +357,9 @@ class Message(SQLModel, table=True):
     sender: User = Relationship(back_populates="messages_sent", sa_relationship_kwargs={"lazy": "selectin"})
 
 
+sa.Index("ix_message_conversation_created_at_id", Message.conversation_id, Message.created_at.desc(), Message.id.desc())
+
+
 class StudentResource(SQLModel, table=True):
     """Resources and links exposed to students via a Student Portal (per institution)."""
     id: str = Field(default_factory=generate_uuid, primary_key=True)
@@ -323,6 +379,12 @@ class StudentResource(SQLModel, table=True):
     institution: Institution = Relationship(back_populates="student_resources", sa_relationship_kwargs={"lazy": "selectin"})
 
 
+sa.Index(
+    "ix_studentresource_institution_created_at_id",
+    StudentResource.institution_id, StudentResource.created_at.desc(), StudentResource.id.desc(),
+)
+
+
 class UploadedDocument(SQLModel, table=True):
     id: str = Field(default_factory=generate_uuid, primary_key=True)
     institution_id: str = Field(foreign_key="institution.id", index=True)
@@ -353,6 +415,9 @@ class Notification(SQLModel, table=True):
     user: User = Relationship(back_populates="notifications", sa_relationship_kwargs={"lazy": "selectin"})
 
 
+sa.Index("ix_notification_user_created_at_id", Notification.user_id, Notification.created_at.desc(), Notification.id.desc())
+
+
 # Models for analysis and metrics (could be in a separate DB/service in a larger system)
 class Sentiment(SQLModel, table=True):
     id: str = Field(default_factory=generate_uuid, primary_key=True)
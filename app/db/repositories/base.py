@@ -1,11 +1,18 @@
 # app/db/repositories/base.py
 from typing import Any, Generic, Type, TypeVar, Optional
 import uuid
+from datetime import datetime
 from sqlmodel import SQLModel, select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
 
+# (created_at, id) of the last row already returned, for newest-first keyset pagination
+Keyset = tuple[datetime, str]
+
 class BaseRepository(Generic[ModelType]):
     def __init__(self, model: Type[ModelType]):
         self.model = model
@@ -17,12 +24,56 @@ class BaseRepository(Generic[ModelType]):
         return result
 
     async def create(self, session: AsyncSession, *, obj_in: SQLModel) -> ModelType:
-        session.add(obj_in)
+        # INSERT ... RETURNING hydrates every column, so there is no refresh SELECT after the
+        # commit; relationships are left unloaded (the create responses are column-only)
+        created = await self.insert(session, obj_in=obj_in, options=[lazyload("*")])
         await session.commit()
-        await session.refresh(obj_in)
-        return obj_in
+        return created
+
+    async def insert(
+        self,
+        session: AsyncSession,
+        *,
+        obj_in: ModelType,
+        conflict_columns: list[str] | None = None,
+        options: list | None = None,
+    ) -> Optional[ModelType]:
+        """
+        INSERT ... RETURNING without committing, so callers can batch it with other writes.
+        With `conflict_columns` the insert is ON CONFLICT DO NOTHING and returns None on a clash.
+        """
+        statement = insert(self.model).values(**obj_in.model_dump())
+        if conflict_columns:
+            statement = statement.on_conflict_do_nothing(index_elements=conflict_columns)
+        statement = statement.returning(self.model)
+        if options:
+            statement = statement.options(*options)
+        result = await session.execute(statement)
+        return result.scalars().first()
+
+    async def update(self, session: AsyncSession, *, id: str, values: dict, options: list | None = None) -> Optional[ModelType]:
+        """Update an instance by primary key and return it in a single UPDATE ... RETURNING round-trip."""
+        statement = update(self.model).where(self.model.id == id).values(**values).returning(self.model)
+        if options:
+            statement = statement.options(*options)
+        result = await session.execute(statement)
+        return result.scalars().first()
 
     async def get_all(self, session: AsyncSession, *, skip: int = 0, limit: int = 100) -> list[ModelType]:
         statement = select(self.model).offset(skip).limit(limit)
         result = await session.execute(statement)
         return result.scalars().all()
+
+    async def get_page(
+        self, session: AsyncSession, *, after_id: Optional[str] = None, limit: int = 100
+    ) -> tuple[list[ModelType], Optional[str]]:
+        """Keyset pagination on the primary key: returns (rows, next_cursor)."""
+        statement = select(self.model).order_by(self.model.id).limit(limit + 1)
+        if after_id is not None:
+            statement = statement.where(self.model.id > after_id)
+        result = await session.execute(statement)
+        rows = list(result.scalars().all())
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, rows[-1].id
+        return rows, None
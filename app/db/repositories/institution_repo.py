@@ -1,9 +1,10 @@
 from typing import Optional
-from sqlmodel import select
-from sqlalchemy.orm import selectinload
+from sqlmodel import select, func
+from sqlalchemy import exists, insert
+from sqlalchemy.orm import lazyload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Institution, UploadedDocument, Post, InstitutionProfile
+from app.db.models import Institution, UploadedDocument, Post, InstitutionProfile, StudentProfile
 
 
 class InstitutionRepository:
@@ -11,8 +12,9 @@ class InstitutionRepository:
         pass
 
     async def get(self, session: AsyncSession, id: str) -> Optional[Institution]:
-        # use selectinload to eagerly load related collections safely in async context
-        return await session.get(Institution, id, options=[selectinload(Institution.students), selectinload(Institution.institution_profiles)])
+        # Columns only: callers never walk the collections, and student/post totals
+        # come from COUNT(*) queries (get_with_counts, get_students_count/get_posts_count)
+        return await session.get(Institution, id, options=[lazyload("*")])
 
     async def get_by_name(self, session: AsyncSession, name: str) -> Optional[Institution]:
         statement = select(Institution).where(Institution.institution_name == name)
@@ -21,23 +23,42 @@ class InstitutionRepository:
         return result.scalars().first()
 
     async def get_students_count(self, session: AsyncSession, institution_id: str) -> int:
-        institution = await session.get(Institution, institution_id, options=[selectinload(Institution.students)])
-        if not institution:
-            return 0
-        return len(institution.students) if hasattr(institution, "students") else 0
+        statement = select(func.count()).select_from(StudentProfile).where(StudentProfile.institution_id == institution_id)
+        return await session.scalar(statement)
 
     async def get_posts_count(self, session: AsyncSession, institution: Institution) -> int:
         # Count posts that have school_scope matching institution name
-        statement = select(Post).where(Post.school_scope == institution.institution_name)
-        # use a count query instead of loading all rows
-        result = await session.execute(statement)
-        return result.scalars().all().__len__()
+        statement = select(func.count()).select_from(Post).where(Post.school_scope == institution.institution_name)
+        return await session.scalar(statement)
+
+    async def get_with_counts(self, session: AsyncSession, institution_id: str) -> tuple[Optional[Institution], int, int]:
+        """The institution with its posts and students totals, as scalar subqueries of one SELECT."""
+        posts_count = (
+            select(func.count()).select_from(Post)
+            .where(Post.school_scope == Institution.institution_name)
+            .correlate(Institution).scalar_subquery()
+        )
+        students_count = (
+            select(func.count()).select_from(StudentProfile)
+            .where(StudentProfile.institution_id == Institution.id)
+            .correlate(Institution).scalar_subquery()
+        )
+        statement = (
+            select(Institution, posts_count.label("posts_count"), students_count.label("students_count"))
+            .where(Institution.id == institution_id)
+            .options(lazyload("*"))
+        )
+        row = (await session.execute(statement)).first()
+        if row is None:
+            return None, 0, 0
+        return row[0], row[1], row[2]
 
     async def create_document(self, session: AsyncSession, *, obj_in: UploadedDocument) -> UploadedDocument:
-        session.add(obj_in)
+        # RETURNING instead of a refresh SELECT after the commit
+        statement = insert(UploadedDocument).values(**obj_in.model_dump()).returning(UploadedDocument)
+        created = (await session.execute(statement.options(lazyload("*")))).scalars().first()
         await session.commit()
-        await session.refresh(obj_in)
-        return obj_in
+        return created
 
     async def get_documents_for_institution(self, session: AsyncSession, institution_id: str):
         statement = select(UploadedDocument).where(UploadedDocument.institution_id == institution_id)
@@ -48,6 +69,24 @@ class InstitutionRepository:
     async def get_document(self, session: AsyncSession, id: str):
         return await session.get(UploadedDocument, id)
 
+    async def get_with_admin_check(
+        self, session: AsyncSession, institution_id: str, user_id: str
+    ) -> tuple[Optional[Institution], bool]:
+        """Fetch the institution and whether `user_id` has an InstitutionProfile for it, in one SELECT."""
+        is_admin = exists().where(
+            InstitutionProfile.user_id == user_id,
+            InstitutionProfile.institution_id == Institution.id,
+        )
+        statement = (
+            select(Institution, is_admin.label("is_admin"))
+            .where(Institution.id == institution_id)
+            .options(lazyload("*"))
+        )
+        row = (await session.execute(statement)).first()
+        if row is None:
+            return None, False
+        return row[0], bool(row[1])
+
     async def is_user_institution_admin(self, session: AsyncSession, user_id: str, institution_id: str) -> bool:
         """Return True if the given user has an InstitutionProfile for the given institution_id."""
         statement = select(InstitutionProfile).where(
@@ -2,19 +2,85 @@
 from typing import List, Optional
 import uuid
 from sqlmodel import select
+from sqlalchemy import lambda_stmt, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, lazyload, load_only, make_transient_to_detached, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.db.models import Institution, Media, Post, PostType, User
+from app.db.repositories.base import BaseRepository, Keyset
+
+def unloaded_relationships():
+    """
+    Catch-all loader for relationships a query didn't ask for: skipped (lazyload) in
+    production, or raising on access with DEBUG_RAISELOAD so a slipped lazy load fails
+    fast in development instead of becoming a silent N+1.
+    """
+    return raiseload("*") if settings.DEBUG_RAISELOAD else lazyload("*")
+
+
+def post_list_options() -> list:
+    """
+    Loader options for pages of posts rendered as PostPublic: the author comes in on the
+    same SELECT via a JOIN, media in one selectin query, and nothing else (likes,
+    comments, the author's own collections, ...) is loaded. Post and author rows are cut
+    down to the columns PostPublic/UserPublic read (plus created_at for the cursor), so
+    password hashes, tokens, bios etc. never leave Postgres.
+    """
+    return [
+        load_only(
+            Post.id, Post.author_id, Post.content, Post.post_type, Post.privacy, Post.created_at, Post.like_count
+        ),
+        joinedload(Post.author)
+        .load_only(User.id, User.full_name, User.email, User.profile_picture, User.role)
+        .options(unloaded_relationships()),
+        selectinload(Post.media).options(unloaded_relationships()),
+        unloaded_relationships(),
+    ]
+
+
+def _feed_statement():
+    # Newest-first page of posts with post_list_options(); built as a lambda_stmt so the
+    # compiled SQL is cached and each call only re-binds its filter/offset/limit values
+    # (id breaks created_at ties so keyset pages neither skip nor repeat rows)
+    return lambda_stmt(
+        lambda: select(Post).options(*post_list_options()).order_by(Post.created_at.desc(), Post.id.desc())
+    )
 
-from app.db.models import Post, PostType
-from app.db.repositories.base import BaseRepository
 
 class PostRepository(BaseRepository[Post]):
+    async def insert_with_author(self, session: AsyncSession, post: Post, media: List[Media], author: User) -> Post:
+        """
+        INSERT the post and stage its media in one round-trip, without committing.
+        `author` is the caller, built from their token (user_from_token); the one column
+        the token lacks, profile_picture, comes back in the INSERT's RETURNING. `media`
+        becomes the post's loaded media list, so once the caller commits the row renders
+        as PostPublic with no re-select.
+        """
+        profile_picture = select(User.profile_picture).where(User.id == post.author_id).scalar_subquery()
+        statement = (
+            insert(Post)
+            .values(**post.model_dump())
+            .returning(Post, profile_picture)
+            .options(unloaded_relationships())
+        )
+        created, author.profile_picture = (await session.execute(statement)).first()
+
+        # Detached: the author is response data only and never joins this session's flush
+        make_transient_to_detached(author)
+        set_committed_value(created, "author", author)
+        session.add_all(media)
+        set_committed_value(created, "media", media)
+        return created
+
     async def get_all_with_author(
         self, session: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[Post]:
         statement = (
             select(Post)
-            .options(selectinload(Post.author))
+            .options(*post_list_options())
             .order_by(Post.created_at.desc())
             .offset(skip)
             .limit(limit)
@@ -23,7 +89,7 @@ class PostRepository(BaseRepository[Post]):
         return result.scalars().all()
 
     async def get_by_id_with_author(self, session: AsyncSession, *, id: str) -> Optional[Post]:
-        statement = select(Post).where(Post.id == id).options(selectinload(Post.author))
+        statement = select(Post).where(Post.id == id).options(*post_list_options())
         result = await session.execute(statement)
         return result.scalars().first()
 
@@ -33,7 +99,7 @@ class PostRepository(BaseRepository[Post]):
         statement = (
             select(Post)
             .where(Post.post_type == PostType.REEL)
-            .options(selectinload(Post.author))
+            .options(*post_list_options())
             .order_by(Post.created_at.desc())
             .offset(skip)
             .limit(limit)
@@ -41,4 +107,78 @@ class PostRepository(BaseRepository[Post]):
         result = await session.execute(statement)
         return result.scalars().all()
 
+    async def _get_feed_page(
+        self, session: AsyncSession, statement, skip: int, limit: int, after: Optional[Keyset] = None
+    ) -> List[Post]:
+        if after is not None:
+            # Keyset page: seek past the cursor row instead of scanning and discarding `skip` rows
+            after_created_at, after_id = after
+            statement += lambda s: s.where(tuple_(Post.created_at, Post.id) < tuple_(after_created_at, after_id))
+            skip = 0
+        statement += lambda s: s.offset(skip).limit(limit)
+        result = await session.execute(statement)
+        return result.scalars().all()
+
+    async def get_channel_feed(
+        self,
+        session: AsyncSession,
+        *,
+        channel_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Keyset] = None,
+    ) -> List[Post]:
+        statement = _feed_statement()
+        statement += lambda s: s.where(Post.channel_id == channel_id)
+        return await self._get_feed_page(session, statement, skip, limit, after)
+
+    async def get_community_feed(
+        self,
+        session: AsyncSession,
+        *,
+        community_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Keyset] = None,
+    ) -> List[Post]:
+        statement = _feed_statement()
+        statement += lambda s: s.where(Post.community_id == community_id)
+        return await self._get_feed_page(session, statement, skip, limit, after)
+
+    async def get_school_scope_feed(
+        self,
+        session: AsyncSession,
+        *,
+        school_scope: str,
+        post_type: Optional[PostType] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Keyset] = None,
+    ) -> List[Post]:
+        statement = _feed_statement()
+        statement += lambda s: s.where(Post.school_scope == school_scope)
+        if post_type:
+            statement += lambda s: s.where(Post.post_type == post_type)
+        return await self._get_feed_page(session, statement, skip, limit, after)
+
+    async def get_institution_timeline(
+        self,
+        session: AsyncSession,
+        *,
+        institution_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Keyset] = None,
+    ) -> List[Post]:
+        """
+        Posts scoped to the institution's name, resolved from its id in SQL. The timeline
+        response only carries post columns, so no relationships are loaded.
+        """
+        statement = lambda_stmt(lambda: select(Post).options(unloaded_relationships()).order_by(Post.created_at.desc(), Post.id.desc()))
+        statement += lambda s: s.where(
+            Post.school_scope
+            == select(Institution.institution_name).where(Institution.id == institution_id).scalar_subquery()
+        )
+        return await self._get_feed_page(session, statement, skip, limit, after)
+
 post_repo = PostRepository(Post)
\ No newline at end of file
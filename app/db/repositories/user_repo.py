@@ -1,23 +1,82 @@
 # app/db/repositories/user_repo.py
 from typing import Optional
-from sqlmodel import select
-from sqlalchemy.orm import selectinload
+from sqlmodel import select, func
+from sqlalchemy import lambda_stmt
+from sqlalchemy.orm import joinedload, lazyload, load_only, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
 
-from app.db.models import User, StudentProfile, Institution
+from app.db.models import User, StudentProfile, Institution, InstitutionProfile
 from app.db.repositories.base import BaseRepository
 
 class UserRepository(BaseRepository[User]):
     async def get_by_email(self, session: AsyncSession, *, email: str) -> Optional[User]:
-        statement = select(User).where(User.email == email).options(selectinload(User.student_profile), selectinload(User.institution_profile))
+        # lambda_stmt: the statement is built once and cached; only `email` is re-bound per call
+        statement = lambda_stmt(lambda: select(User).where(func.lower(User.email) == func.lower(email)).options(selectinload(User.student_profile), selectinload(User.institution_profile)))
         result = await session.execute(statement)
         return result.scalars().first()
 
     async def get_by_username(self, session: AsyncSession, *, username: str) -> Optional[User]:
-        statement = select(User).where(User.username == username).options(selectinload(User.student_profile), selectinload(User.institution_profile))
+        statement = lambda_stmt(lambda: select(User).where(func.lower(User.username) == func.lower(username)).options(selectinload(User.student_profile), selectinload(User.institution_profile)))
         result = await session.execute(statement)
         return result.scalars().first()
 
+    async def get_with_profiles(self, session: AsyncSession, *, user_id: str) -> Optional[User]:
+        """
+        Load a user with its student profile (and that profile's institution) and
+        institution profile in one joined SELECT; every other relationship on the graph
+        is left unloaded.
+        Only the columns /users/me renders are fetched (password hash, tokens etc. stay
+        deferred), so don't read other User/profile columns off the result.
+        """
+        statement = (
+            select(User)
+            .where(User.id == user_id)
+            .options(
+                load_only(User.id, User.profile_picture),
+                joinedload(User.student_profile).options(
+                    load_only(
+                        StudentProfile.id,
+                        StudentProfile.user_id,
+                        StudentProfile.institution_id,
+                        StudentProfile.institution_name,
+                        StudentProfile.matric_number,
+                        StudentProfile.faculty,
+                        StudentProfile.department,
+                        StudentProfile.educational_level,
+                        StudentProfile.course,
+                    ),
+                    joinedload(StudentProfile.institution).options(lazyload("*")),
+                    lazyload("*"),
+                ),
+                joinedload(User.institution_profile).options(
+                    load_only(
+                        InstitutionProfile.id,
+                        InstitutionProfile.user_id,
+                        InstitutionProfile.institution_name,
+                        InstitutionProfile.institution_email,
+                    ),
+                    lazyload("*"),
+                ),
+                lazyload("*"),
+            )
+        )
+        result = await session.execute(statement)
+        return result.unique().scalars().first()
+
+    async def create_if_email_available(self, session: AsyncSession, *, obj_in: User) -> Optional[User]:
+        """INSERT ... ON CONFLICT (lower(email)) DO NOTHING RETURNING *; returns None if the email is taken."""
+        statement = (
+            insert(User)
+            .values(**obj_in.model_dump())
+            .on_conflict_do_nothing(index_elements=[func.lower(User.email)])
+            .returning(User)
+        )
+        result = await session.execute(statement)
+        user = result.scalars().first()
+        await session.commit()
+        return user
+
 user_repo = UserRepository(User)
 
 
@@ -25,7 +84,7 @@ user_repo = UserRepository(User)
 
 class StudentProfileRepository(BaseRepository[StudentProfile]):
     async def get_by_user_id(self, session: AsyncSession, *, user_id: str) -> Optional[StudentProfile]:
-        statement = select(StudentProfile).where(StudentProfile.user_id == user_id).options(selectinload(StudentProfile.institution))
+        statement = lambda_stmt(lambda: select(StudentProfile).where(StudentProfile.user_id == user_id).options(selectinload(StudentProfile.institution)))
         result = await session.execute(statement)
         return result.scalars().first()
 
@@ -34,6 +93,11 @@ student_profile_repo = StudentProfileRepository(StudentProfile)
 
 
 
+institution_profile_repo = BaseRepository(InstitutionProfile)
+
+
+
+
 
 class InstitutionRepository(BaseRepository[Institution]):
     async def get_by_user_id(self, session: AsyncSession, *, user_id: str) -> Optional[Institution]:
@@ -1,8 +1,10 @@
 from dotenv import load_dotenv
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from asyncio import current_task
+from sqlalchemy.ext.asyncio import AsyncSession, async_scoped_session, async_sessionmaker, create_async_engine
 from ssl import create_default_context, CERT_REQUIRED
 from typing import Optional, AsyncGenerator
+from uuid import uuid4
 import logging
 
 from app.core.config import settings
@@ -14,6 +16,7 @@ load_dotenv()
 
 _async_engine = None
 _async_session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+_async_scoped_session: Optional[async_scoped_session[AsyncSession]] = None
 
 def _get_ssl_context():
     """Create SSL context for secure PostgreSQL connections."""
@@ -26,32 +29,71 @@ def _get_ssl_context():
 def _get_ssl_context_none():
     pass
 
+def _async_database_url() -> str:
+    """Always talk to Postgres through asyncpg, whatever scheme the env URL uses."""
+    url = settings.DATABASE_URL_ASYNC
+    for prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def _statement_cache_args() -> dict:
+    if settings.DB_PGBOUNCER:
+        # A transaction-mode bouncer hands each transaction a different server connection,
+        # so a statement prepared on one may not exist on the next: keep both caches off,
+        # and give each unnamed prepare a unique name so two clients sharing a server
+        # connection can't collide on asyncpg's per-connection counter
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    # Direct connections: asyncpg keeps prepared statements per connection, so repeated
+    # queries skip parse/plan for as long as the pooled connection lives
+    return {"prepared_statement_cache_size": 500, "statement_cache_size": 1024}
+
+
+def _server_settings_args() -> dict:
+    if settings.DB_PGBOUNCER:
+        # PgBouncer refuses startup parameters it doesn't track, so nothing is sent; keepalives
+        # for the bouncer's own server connections belong in its config (tcp_keepalive)
+        return {}
+    # jit is switched off for the whole database by migration 7a4c1e9d2b85
+    return {
+        "server_settings": {
+            "tcp_keepalives_idle": "30",
+            "tcp_keepalives_interval": "10",
+            "tcp_keepalives_count": "3",
+        },
+    }
+
+
+def _create_engine():
+    return create_async_engine(
+        _async_database_url(),
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=20,
+        max_overflow=40,
+        # Recycle before typical idle/LB timeouts drop the connection under us
+        pool_recycle=1800,
+        pool_timeout=30,
+        connect_args={
+            **_statement_cache_args(),
+            "ssl": _get_ssl_context_none(),
+            "timeout": 60,
+            "command_timeout": 300,
+            **_server_settings_args(),
+        },
+    )
+
+
 def get_async_engine():
     """Get or create the async engine (lazy initialization)."""
     global _async_engine
     if _async_engine is None:
-        DATABASE_URL = settings.DATABASE_URL_ASYNC
-        
-        _async_engine = create_async_engine(
-            DATABASE_URL,
-            echo=False,
-            pool_pre_ping=True,
-            pool_size=10,
-            max_overflow=20,
-            pool_recycle=900,
-            pool_timeout=30,
-            connect_args={
-                "prepared_statement_cache_size": 0,
-                "ssl": _get_ssl_context_none(),
-                "timeout": 60,
-                "command_timeout": 300,
-                "server_settings": {
-                    "tcp_keepalives_idle": "30",
-                    "tcp_keepalives_interval": "10",
-                    "tcp_keepalives_count": "3",
-                },
-            },
-        )
+        _async_engine = _create_engine()
         logger.info("✅ Async engine created")
     return _async_engine
 
@@ -67,28 +109,7 @@ def get_async_session_maker(force_new: bool = False) -> async_sessionmaker[Async
 
     if force_new:
         logger.warning("⚙️  Forcing creation of a fresh async engine and session maker...")
-        DATABASE_URL = settings.DATABASE_URL_ASYNC
-
-        new_engine = create_async_engine(
-            DATABASE_URL,
-            echo=False,
-            pool_pre_ping=True,
-            pool_size=10,
-            max_overflow=20,
-            pool_recycle=900,
-            pool_timeout=30,
-            connect_args={
-                "prepared_statement_cache_size": 0,
-                "ssl": _get_ssl_context_none(),
-                "timeout": 60,
-                "command_timeout": 300,
-                "server_settings": {
-                    "tcp_keepalives_idle": "30",
-                    "tcp_keepalives_interval": "10",
-                    "tcp_keepalives_count": "3",
-                },
-            },
-        )
+        new_engine = _create_engine()
 
         return async_sessionmaker(
             bind=new_engine,
@@ -112,14 +133,36 @@ def get_async_session_maker(force_new: bool = False) -> async_sessionmaker[Async
 
 
 
+def get_scoped_session() -> async_scoped_session[AsyncSession]:
+    """Get or create the session registry scoped to the current asyncio task (one per request)."""
+    global _async_scoped_session
+    if _async_scoped_session is None:
+        _async_scoped_session = async_scoped_session(get_async_session_maker(), scopefunc=current_task)
+    return _async_scoped_session
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    """FastAPI dependency for getting an async session."""
-    session_maker = get_async_session_maker()
-    async with session_maker() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+    """
+    FastAPI dependency for getting an async session.
+    Every caller inside the same request task gets the same session; it is
+    closed and dropped from the registry when the request finishes.
+    """
+    scoped_session = get_scoped_session()
+    try:
+        yield scoped_session()
+    finally:
+        await scoped_session.remove()
+
+
+async def dispose_engine() -> None:
+    """Close every pooled connection; called once on application shutdown."""
+    global _async_engine, _async_session_maker, _async_scoped_session
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        logger.info("✅ Async engine disposed")
+    _async_engine = None
+    _async_session_maker = None
+    _async_scoped_session = None
 
 
 # Create tables
@@ -1,9 +1,13 @@
+import logging
 from typing import Any, Callable
 from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 from fastapi import FastAPI, status
 from sqlalchemy.exc import SQLAlchemyError
 
+logger = logging.getLogger(__name__)
+
+
 class LagTalkException(Exception):
     """Base class for all AI for Governance platform-related exceptions."""
     
@@ -365,7 +369,7 @@ def register_all_errors(app: FastAPI):
 
     @app.exception_handler(SQLAlchemyError)
     async def database_error(request, exc):
-        print(str(exc))
+        logger.error("Database error: %s", exc)
         return JSONResponse(
             content={
                 "message": "Database error occurred",
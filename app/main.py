@@ -1,14 +1,21 @@
 # app/main.py
+import asyncio
 import logging
+import queue
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from app.core.cache import close_redis
+from app.services.media_service import close_cloudinary_client
 from app.core.config import settings
 from app.core.manager import manager
 from app.core.middleware import register_middleware
-from app.db.session import create_tables
+from app.db.session import create_tables, dispose_engine
+from app.tasks.queue import close_task_pool, init_task_pool
 from app.api.routers import (
     auth,
     users,
@@ -26,7 +33,14 @@ from app.api.routers import (
     chat,
 )
 
-logging.basicConfig(level=logging.INFO)
+# Log records are handed to a queue on the event loop and written to stderr by a
+# listener thread, so enabled logging never blocks a request on stream I/O
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+log_listener = QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
+log_listener.start()
 logger = logging.getLogger(__name__)
 
 # Lifespan manager for startup and shutdown events
@@ -35,9 +49,18 @@ async def lifespan(app: FastAPI):
     # On startup
     logger.info("Starting up...")
     await create_tables()
+    await init_task_pool()
+    # Not awaited: startup shouldn't wait on Cloudinary
+    warm_media_files = asyncio.create_task(users.warm_media_files_cache())
     yield
     # On shutdown
     logger.info("Shutting down...")
+    warm_media_files.cancel()
+    await close_task_pool()
+    await close_redis()
+    await close_cloudinary_client()
+    await dispose_engine()
+    log_listener.stop()
 
 
 app = FastAPI(
@@ -45,7 +68,9 @@ app = FastAPI(
     description="Backend for the LagTALK microblogging platform.",
     version="0.1.0",
     lifespan=lifespan,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    # Serialise route return values with orjson instead of the stdlib encoder
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -99,4 +124,4 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="localhost", port=10000, reload=True)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="localhost", port=10000, reload=True, loop="uvloop")
\ No newline at end of file
@@ -165,6 +165,21 @@ class UserCreateRead(BaseModel):
 
     model_config = ConfigDict(from_attributes=True) 
 
+    @classmethod
+    def from_user(cls, user) -> "UserCreateRead":
+        """Build from a trusted User row with model_construct, skipping field validation."""
+        return cls.model_construct(
+            id=user.id,
+            full_name=user.full_name,
+            email=user.email,
+            role=getattr(user.role, "value", user.role),
+            is_onboarding_completed=user.is_onboarding_completed,
+            profile_picture=user.profile_picture,
+            is_verified=user.is_verified,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
 
 
 class StudentProfileRead(BaseModel):
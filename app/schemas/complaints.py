@@ -20,4 +20,18 @@ class ComplaintPublic(ComplaintBase):
     is_resolved: bool
     created_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ComplaintRead(BaseModel):
+    """Row for the admin complaints list: the complaint's own columns, no relationships."""
+    id: str
+    reporter_id: str
+    reported_post_id: Optional[str] = None
+    reported_comment_id: Optional[str] = None
+    reported_user_id: Optional[str] = None
+    reason: str
+    is_resolved: bool
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from typing import Optional, List, Dict
 
 class ConversationCreate(BaseModel):
@@ -11,7 +12,7 @@ class ConversationPublic(BaseModel):
     title: Optional[str]
     is_group: bool
     created_by: Optional[str]
-    created_at: str
+    created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -26,6 +27,24 @@ class MessagePublic(BaseModel):
     content: str
     attachments: Optional[Dict[str, str]] = None
     is_read: bool
-    created_at: str
+    created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+_conversation_list_adapter = TypeAdapter(List[ConversationPublic])
+
+
+def dump_conversations_json(conversations) -> bytes:
+    """Validate ORM conversations as List[ConversationPublic] and encode them in one pydantic-core pass."""
+    return _conversation_list_adapter.dump_json(
+        _conversation_list_adapter.validate_python(conversations, from_attributes=True)
+    )
+
+
+_message_list_adapter = TypeAdapter(List[MessagePublic])
+
+
+def dump_messages_json(messages) -> bytes:
+    """Validate ORM messages as List[MessagePublic] and encode them in one pydantic-core pass."""
+    return _message_list_adapter.dump_json(_message_list_adapter.validate_python(messages, from_attributes=True))
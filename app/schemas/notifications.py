@@ -1,7 +1,7 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 import uuid
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from app.db.models import NotificationType
 
 
@@ -14,4 +14,18 @@ class NotificationPublic(BaseModel):
     created_at: datetime
 
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+_notification_list_adapter = TypeAdapter(List[NotificationPublic])
+
+
+def dump_notifications_json(notifications) -> bytes:
+    """Validate ORM notifications as List[NotificationPublic] and encode them in one pydantic-core pass."""
+    return _notification_list_adapter.dump_json(
+        _notification_list_adapter.validate_python(notifications, from_attributes=True)
+    )
+
+
+class NotificationsMarkRead(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=200)
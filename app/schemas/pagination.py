@@ -0,0 +1,10 @@
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """A page of results plus the cursor to pass back for the next page (None on the last page)."""
+    items: List[T]
+    next_cursor: Optional[str] = None
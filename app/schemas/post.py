@@ -1,8 +1,8 @@
 # app/schemas.py
 import uuid
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import List, Optional
-from app.db.models import  PostType, PostPrivacy, MediaType, NotificationType
+from app.db.models import  PostType, PostPrivacy, MediaType, MediaStatus, NotificationType
 from app.schemas.auth import UserPublic
 from enum import Enum
 
@@ -18,23 +18,61 @@ class PostCreate(PostBase):
 
 class MediaCreate(BaseModel):
     media_type: MediaType
-    url: str
+    url: Optional[str] = None  # None while the upload is still pending
+    status: MediaStatus = MediaStatus.READY
     file_metadata: Optional[dict] = None  # match SQLModel field
 
+class UploadedMedia(BaseModel):
+    """What the client echoes back from Cloudinary after a signed direct upload."""
+    media_type: MediaType
+    secure_url: str
+    bytes: Optional[int] = None
+    format: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    duration: Optional[float] = None
+
+class PostCreateWithMedia(PostBase):
+    media: List[UploadedMedia] = []
+
 class PostPublic(PostBase):
     id: str
     author_id: str
     post_type: PostType
     author: UserPublic
     media: List[MediaCreate] = []  # ensure default list
+    like_count: int = 0
     model_config = ConfigDict(from_attributes=True)
 
 
 
+_post_list_adapter = TypeAdapter(List[PostPublic])
+
+
+def dump_posts_json(posts, like_deltas: Optional[dict[str, int]] = None) -> bytes:
+    """
+    Validate ORM posts as List[PostPublic] and encode them to JSON in one pydantic-core pass,
+    adding any like deltas the worker hasn't flushed to the rows yet.
+    """
+    public = _post_list_adapter.validate_python(posts, from_attributes=True)
+    if like_deltas:
+        for post in public:
+            post.like_count += like_deltas.get(post.id, 0)
+    return _post_list_adapter.dump_json(public)
+
+
+
 class PresignedUrlResponse(BaseModel):
     upload_url: str
     file_key: str
 
+class CloudinarySignatureResponse(BaseModel):
+    upload_url: str
+    timestamp: int
+    signature: str
+    api_key: str
+    folder: str
+
 class CommentCreate(BaseModel):
     content: str
     parent_comment_id: Optional[str] = None
\ No newline at end of file
@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing import List, Optional
 
 class StudentResourceCreate(BaseModel):
     institution_id: str
@@ -20,3 +20,11 @@ class StudentResourcePublic(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+_resource_list_adapter = TypeAdapter(List[StudentResourcePublic])
+
+
+def dump_student_resources_json(resources) -> bytes:
+    """Validate ORM resources as List[StudentResourcePublic] and encode them in one pydantic-core pass."""
+    return _resource_list_adapter.dump_json(_resource_list_adapter.validate_python(resources, from_attributes=True))
@@ -1,14 +1,54 @@
 # app/services/media_service.py
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Optional
 import boto3
+import cloudinary.utils
+import httpx
 from botocore.client import Config
 from botocore.exceptions import ClientError
 import uuid
 import logging
 
+from app.core.cloudinary import cloudinary
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Uploads go straight to Cloudinary's REST API on the event loop (the SDK is blocking
+# urllib3 and would pin a worker thread per upload). The semaphore bounds how many
+# chunk buffers one process holds at once.
+_cloudinary_upload_slots = asyncio.Semaphore(8)
+_cloudinary_client: Optional[httpx.AsyncClient] = None
+
+# Files above one chunk are sent as a chunked upload (Content-Range + X-Unique-Upload-Id,
+# the protocol behind the SDK's upload_large), read from disk a chunk at a time
+CLOUDINARY_CHUNK_SIZE = 6_000_000
+
+# Optional version segment at the start of a delivery path (".../upload/v1712345678/...")
+_CLOUDINARY_VERSION = re.compile(r"^v\d+/")
+
+
+def get_cloudinary_client() -> httpx.AsyncClient:
+    global _cloudinary_client
+    if _cloudinary_client is None:
+        _cloudinary_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _cloudinary_client
+
+
+async def close_cloudinary_client() -> None:
+    global _cloudinary_client
+    if _cloudinary_client is not None:
+        await _cloudinary_client.aclose()
+        _cloudinary_client = None
+
 class MediaService:
     def __init__(self):
         self.s3_client = boto3.client(
@@ -35,4 +75,113 @@ class MediaService:
             logger.error(f"Error generating presigned URL: {e}")
             return None
 
+    @staticmethod
+    def _signed_cloudinary_params(params: dict) -> dict:
+        """`params` plus timestamp, api_key and signature, as Cloudinary's upload API expects."""
+        config = cloudinary.config()
+        params = {**params, "timestamp": int(time.time())}
+        params["signature"] = cloudinary.utils.api_sign_request(params, config.api_secret)
+        params["api_key"] = config.api_key
+        return params
+
+    def generate_cloudinary_signature(self, folder: str, resource_type: str) -> dict:
+        """
+        Sign a client-side upload so the browser/app sends the file straight to Cloudinary;
+        the API only ever sees the resulting URL.
+        """
+        params = self._signed_cloudinary_params({"folder": folder})
+        return {
+            "upload_url": f"https://api.cloudinary.com/v1_1/{cloudinary.config().cloud_name}/{resource_type}/upload",
+            "timestamp": params["timestamp"],
+            "signature": params["signature"],
+            "api_key": params["api_key"],
+            "folder": folder,
+        }
+
+    def is_own_cloudinary_url(self, url: str, folder: str, resource_type: str) -> bool:
+        """True if `url` is a delivery URL for an asset uploaded to `folder` in this account."""
+        prefix = f"https://res.cloudinary.com/{cloudinary.config().cloud_name}/{resource_type}/upload/"
+        if not url.startswith(prefix):
+            return False
+        # Upload responses give [v<version>/]<public_id>; the public id must start with the folder
+        public_id = _CLOUDINARY_VERSION.sub("", url[len(prefix):], count=1)
+        return public_id.startswith(f"{folder}/")
+
+    async def upload_to_cloudinary(
+        self, file, *, folder: str, resource_type: str, filename: Optional[str] = None, **options
+    ) -> dict:
+        """
+        Upload a path or binary file object to Cloudinary and return its JSON response
+        (secure_url, bytes, format, ...). Extra `options` (e.g. public_id) are signed in.
+        Raises httpx.HTTPStatusError if Cloudinary rejects the upload.
+        """
+        url = f"https://api.cloudinary.com/v1_1/{cloudinary.config().cloud_name}/{resource_type}/upload"
+        params = self._signed_cloudinary_params({"folder": folder, **options})
+        opened = isinstance(file, (str, os.PathLike))
+        stream = open(file, "rb") if opened else file
+        if filename is None:
+            # A SpooledTemporaryFile that rolled over to disk reports its fd (an int) as .name
+            name = file if opened else getattr(file, "name", None)
+            filename = os.path.basename(name) if isinstance(name, (str, os.PathLike)) else "upload"
+
+        async with _cloudinary_upload_slots:
+            try:
+                total = self._file_size(stream)
+                upload_id = uuid.uuid4().hex
+                start = 0
+                while True:
+                    chunk = await asyncio.to_thread(stream.read, CLOUDINARY_CHUNK_SIZE)
+                    headers = {}
+                    if total > CLOUDINARY_CHUNK_SIZE:
+                        end = start + len(chunk) - 1
+                        headers = {"Content-Range": f"bytes {start}-{end}/{total}", "X-Unique-Upload-Id": upload_id}
+                    response = await get_cloudinary_client().post(
+                        url, data=params, files={"file": (filename, chunk)}, headers=headers
+                    )
+                    response.raise_for_status()
+                    start += len(chunk)
+                    if start >= total:
+                        return response.json()
+            finally:
+                if opened:
+                    stream.close()
+
+    async def list_cloudinary_urls(self, *, prefix: str, resource_type: str, max_results: int = 500) -> list[str]:
+        """
+        secure_urls of uploaded assets whose public id starts with `prefix`, via the Admin
+        API's REST endpoint (Basic auth). Raises httpx.HTTPError on failure.
+        """
+        config = cloudinary.config()
+        response = await get_cloudinary_client().get(
+            f"https://api.cloudinary.com/v1_1/{config.cloud_name}/resources/{resource_type}/upload",
+            params={"prefix": prefix, "max_results": max_results},
+            auth=(config.api_key, config.api_secret),
+        )
+        response.raise_for_status()
+        return [r["secure_url"] for r in response.json().get("resources", [])]
+
+    @staticmethod
+    def _file_size(file) -> int:
+        """Remaining size of a seekable file object, without reading it."""
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+        return size - position
+
+    async def spool_to_tempfile(self, file) -> str:
+        """
+        Copy an UploadFile to a temp path that outlives the request (Starlette closes the
+        upload's own spool once the response is sent). The caller owns the returned path.
+        """
+        suffix = os.path.splitext(file.filename or "")[1]
+
+        def _copy() -> str:
+            fd, path = tempfile.mkstemp(suffix=suffix, prefix="upload-")
+            with os.fdopen(fd, "wb") as out:
+                file.file.seek(0)
+                shutil.copyfileobj(file.file, out)
+            return path
+
+        return await asyncio.to_thread(_copy)
+
 media_service = MediaService()
\ No newline at end of file
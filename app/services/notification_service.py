@@ -1,4 +1,5 @@
 # app/services/notification_service.py
+import asyncio
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
@@ -6,12 +7,15 @@ import uuid
 from app.core.manager import manager
 from app.db.models import Notification, NotificationType
 from app.db.repositories.base import BaseRepository
+from app.db.session import get_async_session_maker
 
 logger = logging.getLogger(__name__)
 
 class NotificationService:
     def __init__(self, repository: BaseRepository[Notification]):
         self.repository = repository
+        # Strong references to in-flight background notifications (the loop only keeps weak ones)
+        self._background_tasks: set[asyncio.Task] = set()
 
     async def create_notification(
         self,
@@ -40,4 +44,34 @@ class NotificationService:
         except Exception as e:
             logger.error(f"Failed to send WebSocket notification to user {user_id}: {e}")
 
+    def create_notification_in_background(
+        self,
+        *,
+        user_id: str,
+        notification_type: NotificationType,
+        content: dict
+    ) -> None:
+        """
+        Fire-and-forget create_notification for request handlers: the insert runs on its own
+        session after the response is sent, and failures are logged rather than raised.
+        """
+        task = asyncio.create_task(
+            self._create_notification_with_own_session(
+                user_id=user_id, notification_type=notification_type, content=content
+            )
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+
+    async def _create_notification_with_own_session(self, **kwargs) -> None:
+        # The request's session is closed once the response goes out
+        async with get_async_session_maker()() as session:
+            await self.create_notification(session, **kwargs)
+
+    def _on_background_task_done(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background notification failed", exc_info=task.exception())
+
+
 notification_service = NotificationService(BaseRepository(Notification))
\ No newline at end of file
@@ -1,9 +1,9 @@
-import random
-from sqlmodel import select
+from sqlmodel import select, func
+from sqlalchemy import lambda_stmt, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, Optional
-import resend
 
 from app.db.models import User
 from app.errors import (
@@ -23,16 +23,14 @@ from app.schemas.auth import (
     ResetPasswordModel,
     ForgotPasswordModel, 
 )
-from app.core.auth import generate_passwd_hash, verify_password
-from app.core.config import settings
-import uuid
+from app.core.auth import (
+    generate_passwd_hash_async,
+    generate_verification_token,
+    hash_verification_token,
+    verify_password_cached,
+)
 from app.db.models import UserRole
-from app.utils.resend_email import MailService
-
-
-
-
-mail_service = MailService(resend, settings)
+from app.tasks.queue import enqueue_job_after_commit
 
 
 class UserService:
@@ -40,11 +38,10 @@ class UserService:
         self, email: str, session: AsyncSession
     ) -> Optional[User]:
         """Retrieve a user by their email address."""
-        statement = select(User).where(User.email == email).options(selectinload(User.student_profile), selectinload(User.institution_profile))
+        statement = lambda_stmt(lambda: select(User).where(func.lower(User.email) == func.lower(email)).options(selectinload(User.student_profile), selectinload(User.institution_profile)))
         user = await session.execute(statement)
         user = user.scalar_one_or_none()
         if not user:
-            print("This is the error of not finding the user")
             return None
         return user
      
@@ -59,19 +56,16 @@ class UserService:
         session: AsyncSession,
         is_google: Optional[bool] = False,
     ):
-        """Create a new user in the database."""
-        if await self.user_exists(user_data.email, session):
-            raise UserAlreadyExists(
-                message="A user with this email already exists."
-            )
+        """
+        Create a new user in the database. Uniqueness of email/username is enforced by
+        the table's unique constraints on insert rather than by a SELECT beforehand.
+        """
         # if is_google else False,
-        print("The data coming in: ", user_data)
 
         try:
-          verification_token = str(uuid.uuid4())
-          hash_password = generate_passwd_hash(user_data.password)
+          verification_token = generate_verification_token()
+          hash_password = await generate_passwd_hash_async(user_data.password)
 
-          print("This is the verification token", verification_token)
 
           
 
@@ -81,7 +75,7 @@ class UserService:
             email=user_data.email,
             hashed_password=hash_password,
             is_verified=False if not is_google else True,
-            verification_token = verification_token if not is_google else None,
+            verification_token = hash_verification_token(verification_token) if not is_google else None,
             role = UserRole.GENERAL
           )
 
@@ -89,32 +83,59 @@ class UserService:
           await session.commit()
 
           if not is_google:
-              mail_service.send_verification_email(new_user.email, str(user_data.full_name), verification_token)
-          print("The new user is: ", new_user)
+              await enqueue_job_after_commit(
+                  "send_verification_email",
+                  new_user.email,
+                  str(user_data.full_name),
+                  verification_token,
+                  _job_id=f"verify-email:{new_user.verification_token}",
+              )
           return new_user
       
 
+        except IntegrityError as e:
+            await session.rollback()
+            if "username" in str(e.orig):
+                raise UserAlreadyExists(
+                    message="A user with this username already exists."
+                )
+            raise UserAlreadyExists(
+                message="A user with this email already exists."
+            )
+
         except Exception as e:
             await session.rollback()
             raise e
 
 
-    async def verify_token(self, token: str, session: AsyncSession) -> User:
-        """Verify the token and retrieve the associated user."""
+    async def verify_email(self, token: str, session: AsyncSession) -> User:
+        """
+        Mark the token's unverified owner verified and clear the token in one conditional
+        UPDATE ... RETURNING. Only a miss costs a second query, to tell an already-verified
+        account apart from an unknown token.
+        """
         if token is None:
-          raise InvalidToken(
-              message="The token is invalid. Please try again."
-          )
-        
+            raise InvalidToken(
+                message="The token is invalid. Please try again."
+            )
+
+        token_digest = hash_verification_token(token)
         result = await session.execute(
-            select(User).where(User.verification_token == token).options(selectinload(User.student_profile), selectinload(User.institution_profile))
+            update(User)
+            .where(User.verification_token == token_digest, User.is_verified.is_(False))
+            .values(is_verified=True, verification_token=None)
+            .returning(User)
         )
+        user = result.scalar_one_or_none()
+        if user is None:
+            holder = await session.scalar(select(User.id).where(User.verification_token == token_digest))
+            if holder is None:
+                raise UserNotFound(
+                    message="The user with this token does not exist"
+                )
+            raise EmailAlreadyVerified()
 
-        user = result.scalars().first()
-        if not user:
-            raise UserNotFound(
-                message="The user with this token does not exist"
-            )
+        await session.commit()
         return user
 
 
@@ -125,12 +146,10 @@ class UserService:
         """Authenticate a user by email and password."""
         user = await self.get_user_by_email(email, session)
         if user is None:
-            print("The user is not found")
             raise UserNotFound(
                 message="The user with this email does not exist"
             )
-        if not verify_password(password, user.password):
-            print("The password is not correct")
+        if not await verify_password_cached(password, user.password):
             raise InvalidCredentials(
                 message="The email or password is not correct"
             )
@@ -138,7 +157,6 @@ class UserService:
             raise EmailNotVerified(
                 message="The email is not verified"
             )
-        await session.refresh(user)
         return user
 
     async def update_user(
@@ -149,7 +167,6 @@ class UserService:
             setattr(user, k, v)
         session.add(user)
         await session.commit()
-        await session.refresh(user)
         return user
 
     # reset password
@@ -163,16 +180,22 @@ class UserService:
                 message="The email or password is not correct."
             )
 
-        # Generate and assign a new reset token
-        reset_token = f"{random.randint(1000, 9999)}"
-        user.verification_token = reset_token
+        # Generate and assign a new reset token. It only travels inside the emailed link,
+        # so it can be long enough that no two accounts ever share one
+        reset_token = generate_verification_token()
+        user.verification_token = hash_verification_token(reset_token)
 
         session.add(user)
         await session.commit()
-        await session.refresh(user)
 
-        # Send the reset password email
-        mail_service.send_reset_password_email(user.email, user.full_name, reset_token)
+        # Queue the reset password email for the worker
+        await enqueue_job_after_commit(
+            "send_reset_password_email",
+            user.email,
+            user.full_name,
+            reset_token,
+            _job_id=f"reset-password:{user.verification_token}",
+        )
 
         return ResetPasswordSchemaResponseModel(
             status=True, message="A password reset link has been sent to your email."
@@ -183,16 +206,42 @@ class UserService:
     ) -> ResetPasswordSchemaResponseModel:
         """Reset the user's password"""
         # Update the user's password
-        user.password = generate_passwd_hash(payload.password)
+        user.password = await generate_passwd_hash_async(payload.password)
         user.verification_token = None
         session.add(user)
         await session.commit()
-        await session.refresh(user)
 
         return ResetPasswordSchemaResponseModel(
             status=True, message="Password reset successfully."
         )
 
+    async def reset_password_with_token(
+        self, token: str, payload: ResetPasswordModel, session: AsyncSession
+    ) -> ResetPasswordSchemaResponseModel:
+        """Consume a reset token: set the new password, mark the email verified and clear the token in one UPDATE."""
+        if token is None:
+            raise InvalidToken(
+                message="The token is invalid. Please try again."
+            )
+
+        token_digest = hash_verification_token(token)
+        hashed_password = await generate_passwd_hash_async(payload.password)
+        result = await session.execute(
+            update(User)
+            .where(User.verification_token == token_digest)
+            .values(is_verified=True, verification_token=None, hashed_password=hashed_password)
+            .returning(User.id)
+        )
+        if result.scalar_one_or_none() is None:
+            raise UserNotFound(
+                message="The user with this token does not exist"
+            )
+
+        await session.commit()
+        return ResetPasswordSchemaResponseModel(
+            status=True, message="Password reset successfully."
+        )
+
     async def delete_user(self, user: TokenUser, session: AsyncSession, is_admin: Optional[bool] = False) -> None:
         """Delete a user from the database."""
         statement = select(User).where(User.id == user.id)
@@ -224,11 +273,17 @@ class UserService:
                     raise EmailAlreadyVerified(
                         message="The email is already verified."
                     )
-                verification_token = f"{random.randint(1000, 9999)}"
-                user.verification_token = verification_token
+                verification_token = generate_verification_token()
+                user.verification_token = hash_verification_token(verification_token)
                 session.add(user)
                 await session.commit()
-                mail_service.send_verification_email(user.email, user.full_name, verification_token)
+                await enqueue_job_after_commit(
+                    "send_verification_email",
+                    user.email,
+                    user.full_name,
+                    verification_token,
+                    _job_id=f"verify-email:{user.verification_token}",
+                )
 
             return VerificationMailSchemaResponse(
                 status=True,
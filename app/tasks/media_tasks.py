@@ -1,10 +1,27 @@
 # app/tasks/media_tasks.py
+import asyncio
 import logging
+import os
 import time
 import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import BackgroundTasks, UploadFile
+
+from sqlalchemy import select, update
+
+from app.core.cache import invalidate_post_feeds
+from app.db.models import Media, MediaStatus, MediaType, Post
+from app.db.session import get_async_session_maker
+from app.services.media_service import media_service
+from app.tasks.queue import enqueue_job_after_commit
 
 logger = logging.getLogger(__name__)
 
+# An upload still PENDING after this long has no task left to finish it
+PENDING_MEDIA_TIMEOUT = timedelta(minutes=30)
+
 def process_video_thumbnail(post_id: str):
     """
     Placeholder task for generating a video thumbnail.
@@ -21,4 +38,127 @@ def transcode_video(media_id: str, target_format: str):
     """
     logger.info(f"Starting transcoding for media {media_id} to {target_format}...")
     time.sleep(30)
-    logger.info(f"Finished transcoding for media {media_id}.")
\ No newline at end of file
+    logger.info(f"Finished transcoding for media {media_id}.")
+
+
+async def upload_pending_media(
+    media_id: str,
+    tmp_path: str,
+    folder: str,
+    resource_type: str,
+    thumbnail_post_id: Optional[str] = None,
+    school_scope: Optional[str] = None,
+):
+    """
+    Push a spooled upload to Cloudinary after the response has gone out, then fill in
+    the PENDING Media row (or mark it FAILED). Always removes the temp file.
+    """
+    try:
+        upload = await media_service.upload_to_cloudinary(tmp_path, folder=folder, resource_type=resource_type)
+    except Exception:
+        logger.exception("Cloudinary upload failed for media %s", media_id)
+        values = {Media.status: MediaStatus.FAILED}
+        upload = None
+    else:
+        metadata = {"format": upload.get("format"), "bytes": upload.get("bytes")}
+        if resource_type == "video":
+            metadata["duration"] = upload.get("duration")
+        else:
+            metadata.update(width=upload.get("width"), height=upload.get("height"))
+        values = {Media.url: upload["secure_url"], Media.file_metadata: metadata, Media.status: MediaStatus.READY}
+    finally:
+        os.remove(tmp_path)
+
+    async with get_async_session_maker()() as session:
+        await session.execute(update(Media).where(Media.id == media_id).values(values))
+        await session.commit()
+    # Cached feeds still show the row as PENDING
+    await invalidate_post_feeds(school_scope)
+
+    if upload is not None and thumbnail_post_id:
+        await enqueue_video_thumbnail(thumbnail_post_id)
+
+
+async def enqueue_video_thumbnail(post_id: str) -> None:
+    """
+    Hand thumbnail generation to the ARQ worker; one job per post however often it's
+    requested. Called once the post is committed, so a queue outage is only logged.
+    """
+    await enqueue_job_after_commit("generate_video_thumbnail", post_id, _job_id=f"video-thumbnail:{post_id}")
+
+
+async def stage_media_uploads(
+    post_id: str,
+    *,
+    images: Optional[list[UploadFile]] = None,
+    video: Optional[UploadFile] = None,
+) -> list[tuple[Media, str]]:
+    """Spool the request's files to disk and build a PENDING Media row for each one."""
+    files = [(img, MediaType.IMAGE) for img in images or []]
+    if video:
+        files.append((video, MediaType.VIDEO))
+
+    results = await asyncio.gather(*[media_service.spool_to_tempfile(f) for f, _ in files], return_exceptions=True)
+    tmp_paths = [r for r in results if isinstance(r, str)]
+    for result in results:
+        if isinstance(result, BaseException):
+            # Don't leave the copies that did succeed behind
+            discard_temp_files(tmp_paths)
+            raise result
+    return [
+        (Media(post_id=post_id, media_type=media_type, status=MediaStatus.PENDING), tmp_path)
+        for (_, media_type), tmp_path in zip(files, tmp_paths)
+    ]
+
+
+def discard_temp_files(tmp_paths: list[str]) -> None:
+    for tmp_path in tmp_paths:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+def discard_staged_uploads(staged: list[tuple[Media, str]]) -> None:
+    """Remove the staged temp files; for when the post fails to commit and nothing will upload them."""
+    discard_temp_files([tmp_path for _, tmp_path in staged])
+
+
+async def fail_stale_pending_media(older_than: timedelta = PENDING_MEDIA_TIMEOUT) -> int:
+    """
+    Mark FAILED the PENDING rows whose upload task never reported back (the web process
+    died or restarted before it ran). Media has no timestamp of its own, so age comes
+    from the post.
+    """
+    stale_posts = select(Post.id).where(Post.created_at < datetime.now(timezone.utc) - older_than)
+    async with get_async_session_maker()() as session:
+        result = await session.execute(
+            update(Media)
+            .where(Media.status == MediaStatus.PENDING, Media.post_id.in_(stale_posts))
+            .values(status=MediaStatus.FAILED)
+        )
+        await session.commit()
+    if result.rowcount:
+        await invalidate_post_feeds()
+    return result.rowcount
+
+
+def schedule_media_uploads(
+    background_tasks: BackgroundTasks,
+    staged: list[tuple[Media, str]],
+    *,
+    thumbnail_post_id: Optional[str] = None,
+    school_scope: Optional[str] = None,
+) -> None:
+    """Queue the Cloudinary upload for each staged row; call after the rows are committed."""
+    for media, tmp_path in staged:
+        is_video = media.media_type == MediaType.VIDEO
+        background_tasks.add_task(
+            upload_pending_media,
+            media.id,
+            tmp_path,
+            "posts/videos" if is_video else "posts/images",
+            "video" if is_video else "image",
+            thumbnail_post_id if is_video else None,
+            school_scope,
+        )
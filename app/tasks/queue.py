@@ -0,0 +1,53 @@
+# app/tasks/queue.py
+import logging
+from typing import Any, Optional
+
+from arq import ArqRedis, create_pool
+from arq.connections import RedisSettings
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+redis_settings = RedisSettings.from_dsn(settings.REDIS_URL)
+
+_task_pool: Optional[ArqRedis] = None
+
+
+async def init_task_pool() -> ArqRedis:
+    """Create the ARQ Redis pool used to enqueue jobs (called once from the app lifespan)."""
+    global _task_pool
+    if _task_pool is None:
+        _task_pool = await create_pool(redis_settings)
+        logger.info("✅ Task queue pool created")
+    return _task_pool
+
+
+async def close_task_pool() -> None:
+    global _task_pool
+    if _task_pool is not None:
+        await _task_pool.close()
+        _task_pool = None
+
+
+async def enqueue_job(function: str, *args: Any, _job_id: Optional[str] = None, **kwargs: Any) -> None:
+    """
+    Hand a job to the worker process. Passing `_job_id` makes the enqueue idempotent:
+    ARQ ignores a second job with the same id while the first is queued or running.
+    """
+    pool = await init_task_pool()
+    await pool.enqueue_job(function, *args, _job_id=_job_id, **kwargs)
+
+
+async def enqueue_job_after_commit(function: str, *args: Any, _job_id: Optional[str] = None, **kwargs: Any) -> bool:
+    """
+    enqueue_job for work whose rows are already committed: a Redis outage is logged and
+    reported as False instead of turning a request that succeeded into a 500.
+    """
+    try:
+        await enqueue_job(function, *args, _job_id=_job_id, **kwargs)
+    except (RedisError, OSError):
+        logger.exception("Could not enqueue %s (job %s)", function, _job_id)
+        return False
+    return True
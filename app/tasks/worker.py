@@ -0,0 +1,109 @@
+# app/tasks/worker.py
+"""
+ARQ worker entrypoint. Run with:
+
+    arq app.tasks.worker.WorkerSettings
+"""
+import asyncio
+import logging
+
+import resend
+from arq import Retry, cron
+from resend.exceptions import ResendError
+from sqlalchemy import bindparam, update
+
+from app.core.cache import LIKE_FLUSH_INTERVAL, add_like_delta, pop_like_deltas
+from app.core.config import settings
+from app.db.models import Post
+from app.db.session import get_async_session_maker
+from app.tasks.media_tasks import fail_stale_pending_media, process_video_thumbnail
+from app.tasks.queue import redis_settings
+from app.utils.resend_email import MailService
+
+logger = logging.getLogger(__name__)
+
+mail_service = MailService(resend=resend, settings=settings)
+
+
+# Seconds to wait before retrying a failed send, multiplied by the attempt number
+MAIL_RETRY_BACKOFF = 10
+
+
+def _is_transient_mail_error(exc: Exception) -> bool:
+    """Rate limits, Resend 5xx and network failures are worth retrying; other API errors are not."""
+    if isinstance(exc, ResendError):
+        try:
+            code = int(exc.code)
+        except (TypeError, ValueError):
+            return False
+        return code == 429 or code >= 500
+    return True
+
+
+async def _send_mail(ctx, send, *args) -> None:
+    # The Resend client is synchronous; keep the worker loop free for other jobs.
+    # ARQ only re-runs a job that raises Retry, so transient failures are converted
+    # here; on the last try the original error is raised so the job fails visibly
+    try:
+        await asyncio.to_thread(send, *args)
+    except Exception as exc:
+        if not _is_transient_mail_error(exc) or ctx["job_try"] >= WorkerSettings.max_tries:
+            raise
+        raise Retry(defer=ctx["job_try"] * MAIL_RETRY_BACKOFF) from exc
+
+
+async def send_verification_email(ctx, to_email: str, name: str, verification_token: str):
+    await _send_mail(ctx, mail_service.send_verification_email, to_email, name, verification_token)
+    logger.info("Sent verification email to %s", to_email)
+
+
+async def send_reset_password_email(ctx, to_email: str, name: str, reset_token: str):
+    await _send_mail(ctx, mail_service.send_reset_password_email, to_email, name, reset_token)
+    logger.info("Sent password reset email to %s", to_email)
+
+
+async def generate_video_thumbnail(ctx, post_id: str):
+    # ffmpeg-style CPU work runs here, off the API processes; the thread keeps this
+    # worker's loop free for its other jobs meanwhile
+    await asyncio.to_thread(process_video_thumbnail, post_id)
+
+
+async def flush_like_counts(ctx):
+    """Fold the like deltas accumulated in Redis into post.like_count, one executemany UPDATE."""
+    deltas = await pop_like_deltas()
+    if not deltas:
+        return
+
+    post = Post.__table__
+    statement = (
+        update(post)
+        .where(post.c.id == bindparam("post_id"))
+        .values(like_count=post.c.like_count + bindparam("delta"))
+    )
+    try:
+        async with get_async_session_maker()() as session:
+            await session.execute(statement, [{"post_id": k, "delta": v} for k, v in deltas.items()])
+            await session.commit()
+    except Exception:
+        # The deltas were already taken out of Redis; put them back for the next run
+        for post_id, delta in deltas.items():
+            if not await add_like_delta(post_id, delta):
+                logger.error("Lost like delta %+d for post %s", delta, post_id)
+        raise
+    logger.info("Flushed like counts for %d posts", len(deltas))
+
+
+async def sweep_stale_pending_media(ctx):
+    failed = await fail_stale_pending_media()
+    if failed:
+        logger.warning("Marked %d stale pending media rows as failed", failed)
+
+
+class WorkerSettings:
+    functions = [send_verification_email, send_reset_password_email, generate_video_thumbnail]
+    cron_jobs = [
+        cron(flush_like_counts, second=set(range(0, 60, LIKE_FLUSH_INTERVAL))),
+        cron(sweep_stale_pending_media, minute={0, 15, 30, 45}),
+    ]
+    redis_settings = redis_settings
+    max_tries = 5
@@ -1,5 +1,8 @@
+import logging
 from typing import Optional, List
 
+logger = logging.getLogger(__name__)
+
 class MailService:
     def __init__(self, resend, settings):
         self.resend = resend
@@ -98,9 +101,10 @@ class MailService:
 
         try:
             email = self.resend.Emails.send(params)
-            print(email)
+            logger.debug("Verification email response: %s", email)
         except Exception as e:
-            print(f"Error sending verification email: {e}")
+            logger.error("Error sending verification email: %s", e)
+            raise e
 
     def send_reset_password_email(self, to_email: str, name: Optional[str], reset_token: str, is_admin: Optional[bool] = False, which_user: Optional[str] = None, admin_password: Optional[str] = None):
         reset_link = f"{self.settings.FRONTEND_URL}/auth/reset-password?token={reset_token}"
@@ -181,9 +185,10 @@ class MailService:
 
         try:
             email = self.resend.Emails.send(params)
-            print(email)
+            logger.debug("Password reset email response: %s", email)
         except Exception as e:
-            print(f"Error sending password reset email: {e}")
+            logger.error("Error sending password reset email: %s", e)
+            raise e
 
     def send_announcement_email(self, to_emails: List[str], subject: str, greetings: str, message: str):
         params = {
@@ -248,8 +253,8 @@ class MailService:
 
         try:
             email = self.resend.Emails.send(params)
-            print(f"Email sent to: {to_emails}")
+            logger.info("Email sent to: %s", to_emails)
             return email
         except Exception as e:
-            print(f"Error sending announcement email: {e}")
+            logger.error("Error sending announcement email: %s", e)
             raise e
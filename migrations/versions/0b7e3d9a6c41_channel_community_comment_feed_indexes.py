@@ -0,0 +1,40 @@
+"""channel community comment feed indexes
+
+Revision ID: 0b7e3d9a6c41
+Revises: f52c9b0e7a13
+Create Date: 2026-10-15 18:31:52.804716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e3d9a6c41'
+down_revision: Union[str, Sequence[str], None] = 'f52c9b0e7a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_post_channel_created_at_id', 'post', ['channel_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_where=sa.text('channel_id IS NOT NULL'), postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_post_community_created_at_id', 'post', ['community_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_where=sa.text('community_id IS NOT NULL'), postgresql_concurrently=True,
+        )
+        op.create_index('ix_comment_post_created_at', 'comment', ['post_id', 'created_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_comment_post_created_at', table_name='comment', postgresql_concurrently=True)
+        op.drop_index('ix_post_community_created_at_id', table_name='post', postgresql_concurrently=True)
+        op.drop_index('ix_post_channel_created_at_id', table_name='post', postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""media upload status
+
+Revision ID: 3a6f0c9e1b58
+Revises: 5d7b2e9c0a14
+Create Date: 2026-10-15 14:05:31.518270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a6f0c9e1b58'
+down_revision: Union[str, Sequence[str], None] = '5d7b2e9c0a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows were uploaded synchronously, so they are all ready
+    op.add_column('media', sa.Column('status', sa.String(length=16), server_default='ready', nullable=False))
+    op.alter_column('media', 'url', existing_type=sqlmodel.sql.sqltypes.AutoString(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM media WHERE url IS NULL")
+    op.alter_column('media', 'url', existing_type=sqlmodel.sql.sqltypes.AutoString(), nullable=False)
+    op.drop_column('media', 'status')
@@ -0,0 +1,30 @@
+"""index verification token
+
+Revision ID: 4f1c2a9d7e30
+Revises: 037583b23161
+Create Date: 2026-10-15 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1c2a9d7e30'
+down_revision: Union[str, Sequence[str], None] = '037583b23161'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tokens are now stored as sha256 digests; any outstanding plaintext tokens can no
+    # longer match, so clear them and let users request a new one.
+    op.execute("UPDATE \"user\" SET verification_token = NULL WHERE verification_token IS NOT NULL")
+    op.create_index(op.f('ix_user_verification_token'), 'user', ['verification_token'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_verification_token'), table_name='user')
@@ -0,0 +1,42 @@
+"""denormalize student institution
+
+Revision ID: 5d7b2e9c0a14
+Revises: e2a8f4b61d95
+Create Date: 2026-10-15 11:40:52.204618
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7b2e9c0a14'
+down_revision: Union[str, Sequence[str], None] = 'e2a8f4b61d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('studentprofile', sa.Column('institution_profile_picture', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('studentprofile', sa.Column('institution_website', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    # Backfill existing profiles from their institution row
+    op.execute(
+        """
+        UPDATE studentprofile AS sp
+        SET institution_profile_picture = i.institution_profile_picture,
+            institution_website = i.institution_website,
+            institution_name = COALESCE(sp.institution_name, i.institution_name)
+        FROM institution AS i
+        WHERE sp.institution_id = i.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('studentprofile', 'institution_website')
+    op.drop_column('studentprofile', 'institution_profile_picture')
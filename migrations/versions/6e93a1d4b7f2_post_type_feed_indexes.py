@@ -0,0 +1,36 @@
+"""post type feed indexes
+
+Revision ID: 6e93a1d4b7f2
+Revises: b41d7f2c8e60
+Create Date: 2026-10-15 17:10:44.120583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e93a1d4b7f2'
+down_revision: Union[str, Sequence[str], None] = 'b41d7f2c8e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_post_type_created_at_id', 'post', ['post_type', sa.text('created_at DESC'), sa.text('id DESC')], unique=False, postgresql_concurrently=True)
+        op.create_index(
+            'ix_post_school_scope_type_created_at_id', 'post',
+            ['school_scope', 'post_type', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_where=sa.text('school_scope IS NOT NULL'), postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_post_school_scope_type_created_at_id', table_name='post', postgresql_concurrently=True)
+        op.drop_index('ix_post_type_created_at_id', table_name='post', postgresql_concurrently=True)
@@ -0,0 +1,45 @@
+"""disable jit for database
+
+Revision ID: 7a4c1e9d2b85
+Revises: 0b7e3d9a6c41
+Create Date: 2026-10-15 19:02:11.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4c1e9d2b85'
+down_revision: Union[str, Sequence[str], None] = '0b7e3d9a6c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A database-level default reaches every session, including ones opened through
+    # PgBouncer, which rejects jit as a startup parameter
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            EXECUTE format('ALTER DATABASE %I SET jit = off', current_database());
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            EXECUTE format('ALTER DATABASE %I RESET jit', current_database());
+        END
+        $$;
+        """
+    )
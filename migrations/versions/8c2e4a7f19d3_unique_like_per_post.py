@@ -0,0 +1,42 @@
+"""unique like per post
+
+Revision ID: 8c2e4a7f19d3
+Revises: 3a6f0c9e1b58
+Create Date: 2026-10-15 15:22:07.341905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2e4a7f19d3'
+down_revision: Union[str, Sequence[str], None] = '3a6f0c9e1b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The old check-then-insert toggle could race into duplicate likes; keep one of each
+    op.execute(
+        """
+        DELETE FROM "like" AS a
+        USING "like" AS b
+        WHERE a.post_id IS NOT NULL
+          AND a.post_id = b.post_id
+          AND a.user_id = b.user_id
+          AND a.id > b.id
+        """
+    )
+    op.create_index(
+        'uq_like_user_post', 'like', ['user_id', 'post_id'], unique=True,
+        postgresql_where=sa.text('post_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_like_user_post', table_name='like')
@@ -0,0 +1,32 @@
+"""lower email and username indexes
+
+Revision ID: 9b3e5d1c2a47
+Revises: 4f1c2a9d7e30
+Create Date: 2026-10-15 14:27:03.512876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e5d1c2a47'
+down_revision: Union[str, Sequence[str], None] = '4f1c2a9d7e30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Lookups compare lower(email) / lower(username); index the same expressions so
+    # Postgres can use them instead of scanning the table.
+    op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=False)
+    op.create_index('ix_user_username_lower', 'user', [sa.text('lower(username)')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_username_lower', table_name='user')
+    op.drop_index('ix_user_email_lower', table_name='user')
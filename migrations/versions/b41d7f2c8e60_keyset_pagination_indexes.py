@@ -0,0 +1,40 @@
+"""keyset pagination indexes
+
+Revision ID: b41d7f2c8e60
+Revises: 8c2e4a7f19d3
+Create Date: 2026-10-15 16:48:12.907354
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41d7f2c8e60'
+down_revision: Union[str, Sequence[str], None] = '8c2e4a7f19d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built CONCURRENTLY so the feed tables stay writable while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index('ix_post_created_at_id', 'post', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False, postgresql_concurrently=True)
+        op.create_index(
+            'ix_post_school_scope_created_at_id', 'post', ['school_scope', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_where=sa.text('school_scope IS NOT NULL'), postgresql_concurrently=True,
+        )
+        op.create_index('ix_message_conversation_created_at_id', 'message', ['conversation_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_notification_user_created_at_id', 'notification', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_notification_user_created_at_id', table_name='notification', postgresql_concurrently=True)
+        op.drop_index('ix_message_conversation_created_at_id', table_name='message', postgresql_concurrently=True)
+        op.drop_index('ix_post_school_scope_created_at_id', table_name='post', postgresql_concurrently=True)
+        op.drop_index('ix_post_created_at_id', table_name='post', postgresql_concurrently=True)
@@ -0,0 +1,38 @@
+"""unique lower email and username
+
+Revision ID: c7d41e8f03b2
+Revises: 9b3e5d1c2a47
+Create Date: 2026-10-15 18:02:55.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d41e8f03b2'
+down_revision: Union[str, Sequence[str], None] = '9b3e5d1c2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build the unique versions CONCURRENTLY so "user" stays writable; this fails
+    # (and should be fixed by hand) if two accounts differ only by letter case.
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_email_lower', table_name='user', postgresql_concurrently=True)
+        op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=True, postgresql_concurrently=True)
+        op.drop_index('ix_user_username_lower', table_name='user', postgresql_concurrently=True)
+        op.create_index('ix_user_username_lower', 'user', [sa.text('lower(username)')], unique=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_username_lower', table_name='user', postgresql_concurrently=True)
+        op.create_index('ix_user_username_lower', 'user', [sa.text('lower(username)')], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_user_email_lower', table_name='user', postgresql_concurrently=True)
+        op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=False, postgresql_concurrently=True)
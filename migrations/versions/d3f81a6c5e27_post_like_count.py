@@ -0,0 +1,34 @@
+"""post like count
+
+Revision ID: d3f81a6c5e27
+Revises: 6e93a1d4b7f2
+Create Date: 2026-10-15 17:42:08.311594
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f81a6c5e27'
+down_revision: Union[str, Sequence[str], None] = '6e93a1d4b7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('post', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    # Seed from the likes table; from here on the worker applies the Redis deltas
+    op.execute(
+        "UPDATE post SET like_count = counts.n "
+        "FROM (SELECT post_id, count(*) AS n FROM \"like\" WHERE post_id IS NOT NULL GROUP BY post_id) AS counts "
+        "WHERE post.id = counts.post_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('post', 'like_count')
@@ -0,0 +1,35 @@
+"""bound verification token length
+
+Revision ID: e2a8f4b61d95
+Revises: c7d41e8f03b2
+Create Date: 2026-10-15 11:02:17.530941
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a8f4b61d95'
+down_revision: Union[str, Sequence[str], None] = 'c7d41e8f03b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only sha256 hex digests are stored here, so the column never needs more than 64 chars
+    op.alter_column('user', 'verification_token',
+               existing_type=sqlmodel.sql.sqltypes.AutoString(),
+               type_=sqlmodel.sql.sqltypes.AutoString(length=64),
+               existing_nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('user', 'verification_token',
+               existing_type=sqlmodel.sql.sqltypes.AutoString(length=64),
+               type_=sqlmodel.sql.sqltypes.AutoString(),
+               existing_nullable=True)
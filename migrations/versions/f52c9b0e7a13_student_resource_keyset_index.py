@@ -0,0 +1,34 @@
+"""student resource keyset index
+
+Revision ID: f52c9b0e7a13
+Revises: d3f81a6c5e27
+Create Date: 2026-10-15 18:05:27.640139
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f52c9b0e7a13'
+down_revision: Union[str, Sequence[str], None] = 'd3f81a6c5e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_studentresource_institution_created_at_id', 'studentresource',
+            ['institution_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_studentresource_institution_created_at_id', table_name='studentresource', postgresql_concurrently=True)
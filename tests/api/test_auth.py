@@ -40,4 +40,141 @@ async def test_login_for_access_token(client: AsyncClient, db_session: AsyncSess
     print(f"response.json() = {response.json()}\n\n\n\n")
     data = response.json()
     assert "campustalk_access_token" in data
-    assert data["token_type"] == "bearer"
\ No newline at end of file
+    assert data["token_type"] == "bearer"
+
+async def _pending_users(db_session: AsyncSession):
+    from app.core.auth import generate_verification_token, hash_verification_token
+    from app.db.models import User
+
+    tokens = [generate_verification_token() for _ in range(2)]
+    users = [
+        User(
+            email=f"pending{i}@example.com",
+            full_name=f"Pending {i}",
+            hashed_password="hashed_password",
+            is_verified=False,
+            verification_token=hash_verification_token(token),
+        )
+        for i, token in enumerate(tokens)
+    ]
+    db_session.add_all(users)
+    await db_session.commit()
+    return users, tokens
+
+
+@pytest.mark.asyncio
+async def test_verify_email_updates_only_the_token_owner(client: AsyncClient, db_session: AsyncSession):
+    from app.db.models import User
+
+    (first, second), (first_token, _) = await _pending_users(db_session)
+
+    response = await client.post("/api/v1/auth/verify-email/", params={"token": first_token})
+    assert response.status_code == status.HTTP_200_OK
+
+    db_session.expire_all()
+    verified = await db_session.get(User, first.id)
+    assert verified.is_verified is True
+    assert verified.verification_token is None
+    untouched = await db_session.get(User, second.id)
+    assert untouched.is_verified is False
+    assert untouched.verification_token is not None
+
+    response = await client.post("/api/v1/auth/verify-email/", params={"token": first_token})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_verify_email_rejects_a_token_held_by_a_verified_user(client: AsyncClient, db_session: AsyncSession):
+    from app.db.models import User
+
+    (user, _), (token, _) = await _pending_users(db_session)
+    user.is_verified = True
+    await db_session.commit()
+
+    response = await client.post("/api/v1/auth/verify-email/", params={"token": token})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    db_session.expire_all()
+    assert (await db_session.get(User, user.id)).verification_token is not None
+
+
+@pytest.mark.asyncio
+async def test_reset_password_updates_only_the_token_owner(client: AsyncClient, db_session: AsyncSession):
+    from app.core.auth import generate_verification_token, hash_verification_token
+    from app.db.models import User
+
+    (owner, other), _ = await _pending_users(db_session)
+    reset_token = generate_verification_token()
+    owner.verification_token = hash_verification_token(reset_token)
+    await db_session.commit()
+
+    response = await client.post(
+        "/api/v1/auth/reset-password/", params={"token": reset_token}, json={"password": "n3w-password"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    db_session.expire_all()
+    reset = await db_session.get(User, owner.id)
+    assert reset.hashed_password != "hashed_password"
+    assert reset.verification_token is None
+    untouched = await db_session.get(User, other.id)
+    assert untouched.hashed_password == "hashed_password"
+    assert untouched.is_verified is False
+
+
+@pytest.mark.asyncio
+async def test_upload_profile_picture_larger_than_spool(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    # Over 1MB, Starlette rolls the upload over to disk and the spool's .name becomes an int fd
+    import httpx
+    from app.core.auth import create_access_token
+    from app.core.cloudinary import cloudinary
+    from app.db.models import User
+    from app.services import media_service as media_module
+
+    user = User(email="picture@example.com", full_name="Picture User", hashed_password="hashed_password", is_verified=True)
+    db_session.add(user)
+    await db_session.commit()
+
+    sent_filenames = []
+
+    def cloudinary_upload(request: httpx.Request) -> httpx.Response:
+        sent_filenames.append(b'filename="avatar.png"' in request.content)
+        return httpx.Response(200, json={"secure_url": "https://res.cloudinary.com/test/image/upload/profile_pictures/avatar.png"})
+
+    cloudinary.config(cloud_name="test", api_key="key", api_secret="secret")
+    monkeypatch.setattr(media_module, "_cloudinary_client", httpx.AsyncClient(transport=httpx.MockTransport(cloudinary_upload)))
+
+    picture = b"\x89PNG\r\n\x1a\n" + b"\0" * 1_500_000
+    response = await client.post(
+        "/api/v1/auth/profile/picture",
+        files={"file": ("avatar.png", picture, "image/png")},
+        headers={"Authorization": f"Bearer {create_access_token(user=user)}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert sent_filenames and all(sent_filenames)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("scheme", ["argon2", "bcrypt"])
+async def test_login_accepts_argon2_and_legacy_bcrypt_hashes(client: AsyncClient, db_session: AsyncSession, scheme: str):
+    import bcrypt
+    from app.core.auth import get_password_hash, verify_password
+    from app.db.models import User
+
+    password = "strongpassword"
+    if scheme == "argon2":
+        hashed = get_password_hash(password)
+        assert hashed.startswith("$argon2")
+    else:
+        # Accounts created before the switch keep their passlib-era $2b$ hashes
+        hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        assert hashed.startswith("$2b$")
+    assert verify_password(password, hashed)
+    assert not verify_password("wrongpassword", hashed)
+
+    db_session.add(User(email=f"{scheme}@example.com", full_name=scheme, hashed_password=hashed, is_verified=True))
+    await db_session.commit()
+
+    response = await client.post("/api/v1/auth/login", data={"email": f"{scheme}@example.com", "password": password})
+    assert response.status_code == status.HTTP_200_OK
+    assert "campustalk_access_token" in response.json()
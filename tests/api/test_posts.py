@@ -41,4 +41,35 @@ async def test_create_post(client: AsyncClient, auth_headers: dict, db_session:
     data = response.json()
     assert data["content"] == post_data["content"]
     assert "author" in data
-    assert data["author"]["username"] == "postuser"
\ No newline at end of file
+    assert data["author"]["username"] == "postuser"
+
+@pytest.mark.asyncio
+async def test_read_posts_cursor_round_trip(client: AsyncClient, db_session: AsyncSession):
+    from datetime import datetime, timedelta, timezone
+    from app.api.deps import NEXT_CURSOR_HEADER
+    from app.db.models import Post
+
+    author = User(email="cursor@example.com", full_name="Cursor User", hashed_password="hashed_password")
+    db_session.add(author)
+    await db_session.commit()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    posts = [Post(author_id=author.id, content=f"post {i}", created_at=start + timedelta(minutes=i)) for i in range(3)]
+    db_session.add_all(posts)
+    await db_session.commit()
+
+    first = await client.get("/api/v1/posts/", params={"limit": 2})
+    assert first.status_code == status.HTTP_200_OK
+    assert [p["content"] for p in first.json()] == ["post 2", "post 1"]
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+
+    second = await client.get("/api/v1/posts/", params={"limit": 2, "cursor": cursor})
+    assert second.status_code == status.HTTP_200_OK
+    assert [p["content"] for p in second.json()] == ["post 0"]
+    assert NEXT_CURSOR_HEADER not in second.headers
+
+
+@pytest.mark.asyncio
+async def test_read_posts_invalid_cursor(client: AsyncClient, db_session: AsyncSession):
+    response = await client.get("/api/v1/posts/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor"
@@ -14,8 +14,10 @@ from app.db.session import get_session
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 engine = create_async_engine(TEST_DATABASE_URL, echo=True, future=True)
+# Match app/db/session.py: handlers return RETURNING-hydrated rows after commit
+# without a refresh, which only works when commit leaves them unexpired
 AsyncTestingSessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
+    autocommit=False, autoflush=False, bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
 async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]: